@@ -17,7 +17,8 @@ Instructions:
     python examples/remote_inference_example.py
 
 This script connects to the robot, streams observations to the server, receives actions, and
-applies them at 30 Hz.
+applies them at 30 Hz. Inference runs in the client's background thread: each tick publishes the newest
+observation and applies the newest action available, so a slow round trip never stalls the control loop.
 """
 
 import logging
@@ -27,7 +28,7 @@ from lerobot.common.robots.so100_follower.config_so100_follower import (
     SO100FollowerConfig,
 )
 from lerobot.common.robots.utils import make_robot_from_config
-from lerobot.common.utils.robot_utils import busy_wait
+from lerobot.common.utils.robot_utils import hybrid_wait
 from lerobot.remote.client import RemoteInferenceClient
 from lerobot.remote.config import RemoteInferenceConfig
 
@@ -52,6 +53,7 @@ remote_cfg = RemoteInferenceConfig(
     server_port=SERVER_PORT,
     policy_path=POLICY_PATH,
     robot_config=robot_cfg,
+    action_feature_names=list(robot.action_features),
 )
 client = RemoteInferenceClient(remote_cfg)
 
@@ -61,13 +63,16 @@ logging.info(f"Connected to {robot}")
 
 try:
     logging.info("Starting control loop...")
+    client.start_background()
     while True:
         start = time.perf_counter()
         obs = robot.get_observation()
-        action = client(obs)
-        robot.send_action(action)
+        client.push_observation(obs)
+        action = client.latest_action()
+        if action is not None:
+            robot.send_action(action)
         # maintain 30 Hz control frequency
-        busy_wait(max(0, 1 / 30 - (time.perf_counter() - start)))
+        hybrid_wait(max(0, 1 / 30 - (time.perf_counter() - start)))
 
 except KeyboardInterrupt:
     logging.info("Interrupted by user, shutting down...")
@@ -1,10 +1,14 @@
-"""Example of using remote inference with SO-100 robot."""
+"""Example of using remote inference with SO-100 robot.
+
+Inference runs in the client's background thread, so the 30 Hz loop below never waits on the network: it
+publishes the newest observation and applies the newest action available.
+"""
 
 import logging
 import time
 
 from lerobot.common.robots.so100_follower import SO100Follower, SO100FollowerConfig
-from lerobot.common.utils.robot_utils import busy_wait
+from lerobot.common.utils.robot_utils import hybrid_wait
 from lerobot.remote import RemoteInferenceClient, RemoteInferenceConfig
 
 
@@ -17,16 +21,18 @@ def main():
         id="so100",
     )
 
+    robot = SO100Follower(robot_config)
+
     # Configure remote inference
     inference_config = RemoteInferenceConfig(
         server_host="your.server.ip",  # Replace with actual server IP
         server_port=5555,
         policy_path="lerobot/your-policy-name",  # Replace with your policy
         robot_config=robot_config,
+        action_feature_names=list(robot.action_features),
     )
 
-    # Initialize robot and policy
-    robot = SO100Follower(robot_config)
+    # Initialize policy
     policy = RemoteInferenceClient(inference_config)
 
     try:
@@ -36,21 +42,22 @@ def main():
 
         # Main control loop
         logging.info("Starting control loop...")
+        policy.start_background()
         while True:
             loop_start = time.perf_counter()
 
-            # Get observation from robot
+            # Get observation from robot and hand it to the inference thread
             observation = robot.get_observation()
+            policy.push_observation(observation)
 
-            # Get action from remote policy
-            action = policy(observation)
-
-            # Send action to robot
-            robot.send_action(action)
+            # Send the most recent action to robot (none until the first reply arrives)
+            action = policy.latest_action()
+            if action is not None:
+                robot.send_action(action)
 
             # Maintain consistent control frequency
             dt_s = time.perf_counter() - loop_start
-            busy_wait(1 / 30 - dt_s)  # 30 Hz control loop
+            hybrid_wait(1 / 30 - dt_s)  # 30 Hz control loop
 
     except KeyboardInterrupt:
         logging.info("Stopping...")
@@ -28,7 +28,7 @@ class RemoteRunConfig:
     model_name: str = "so100_wc"
     timeout: float = 5.0
     retries: int = 3
-    backoff: float = 0.5
+    backoff: float = 0.01
     interval: float = 1/30
     log_level: str = "INFO"
 
@@ -90,6 +90,9 @@ def main() -> None:
         if not client.health_check():
             logging.getLogger(__name__).warning("Remote server health check failed")
 
+        # Action feature names are fixed for the robot, resolve them once
+        keys: List[str] = list(robot.action_features.keys())
+
         try:
             while True:
                 # Acquire observation
@@ -99,9 +102,8 @@ def main() -> None:
                 action: Tensor = client.select_action(obs)
 
                 # Convert tensor to action dict
-                keys: List[str] = list(robot.action_features.keys())
                 action_np: np.ndarray = action.detach().cpu().numpy()
-                action_dict: Dict[str, float] = {k: float(v) for k, v in zip(keys, action_np)}
+                action_dict: Dict[str, float] = dict(zip(keys, action_np.tolist()))
 
                 # Send to robot
                 robot.send_action(action_dict)
@@ -1,19 +1,67 @@
 """
 Client wrapper for remote policy inference in LeRobot.
 """
+from collections import deque
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
+import json
 import logging
-import requests
+import msgpack
 import time
-import random
+import urllib3
+import numpy as np
 import torch
 from torch import Tensor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 __all__ = ["RemotePolicyConfig", "RemotePolicyClient"]
 
 logger = logging.getLogger(__name__)
 
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+JSON_CONTENT_TYPE = "application/json"
+# Torch dtypes without a numpy equivalent, sent as float32 instead
+_NON_NUMPY_DTYPES = frozenset(
+    getattr(torch, name) for name in ("bfloat16", "float8_e4m3fn", "float8_e5m2") if hasattr(torch, name)
+)
+
+
+def _pack_array(array: np.ndarray) -> Dict[str, Any]:
+    """Describe an array as dtype, shape and its raw bytes for the msgpack body."""
+    return {
+        "dtype": array.dtype.name,
+        "shape": list(array.shape),
+        "data": np.ascontiguousarray(array).data,
+    }
+
+
+def _dumps_json(payload: Dict[str, Any]) -> bytes:
+    """JSON body; orjson writes numpy arrays natively, the stdlib fallback needs them as lists."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=np.ndarray.tolist, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=np.ndarray.tolist).encode()
+
+
+def _loads_json(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _unpack_tensor(obj: Dict[str, Any]) -> Tensor:
+    """Inverse of `_pack_array`; the bytes are copied once into a writable buffer."""
+    dtype = getattr(torch, obj["dtype"])
+    return torch.frombuffer(bytearray(obj["data"]), dtype=dtype).reshape(obj["shape"])
+
+
+def _raise_for_status(resp: urllib3.response.HTTPResponse) -> None:
+    """Raise for 4xx/5xx responses, like `requests.Response.raise_for_status`."""
+    if resp.status >= 400:
+        raise urllib3.exceptions.HTTPError(f"HTTP {resp.status} {resp.reason} for {resp.geturl()}")
+
+
 @dataclass(frozen=True)
 class RemotePolicyConfig:
     """
@@ -23,12 +71,26 @@ class RemotePolicyConfig:
         endpoint: URL of the inference server (e.g., "http://localhost:8000").
         model_name: Name or identifier of the model on the server.
         timeout: Request timeout in seconds.
+        max_retries: Number of POST attempts before giving up.
+        backoff_factor: Delay before the first retry, doubled on every further attempt.
+        max_backoff: Upper bound on the delay between retries, kept near one control period.
+        pool_maxsize: Number of keep-alive connections kept open to the endpoint.
+        content_type: Request body encoding, "application/json" (lists of numbers, encoded with orjson
+            if it is installed) or "application/msgpack" (raw tensor bytes, much smaller and cheaper
+            to build for images).
+        action_horizon: Number of consecutive actions requested per call. The server answers with an
+            action sequence and `select_action` replays it one action per call before querying again,
+            amortizing one round trip over `action_horizon` control ticks.
     """
     endpoint: str
     model_name: str
     timeout: float = 5.0
     max_retries: int = 3
-    backoff_factor: float = 0.5  # base for exponential backoff
+    backoff_factor: float = 0.01  # base for exponential backoff
+    max_backoff: float = 0.05
+    pool_maxsize: int = 4
+    content_type: str = JSON_CONTENT_TYPE
+    action_horizon: int = 1
 
 class RemotePolicyClient:
     """
@@ -50,7 +112,29 @@ class RemotePolicyClient:
         Initialize the remote policy client.
         """
         self.config: RemotePolicyConfig = config
-        self.session: requests.Session = requests.Session()
+        # Single endpoint: one small pool of connections, which HTTP/1.1 keeps open between requests, driven
+        # through urllib3 directly to skip the per-request preparation of `requests`. Retries are handled in
+        # select_action, so the pool never retries.
+        self.http: urllib3.PoolManager = urllib3.PoolManager(
+            num_pools=1,
+            maxsize=config.pool_maxsize,
+            retries=False,
+        )
+        # The endpoint is fixed for the lifetime of the client, build the URLs and msgpack headers once
+        base_url = config.endpoint.rstrip("/")
+        self._predict_url: str = f"{base_url}/predict"
+        self._health_url: str = f"{base_url}/health"
+        self._msgpack_headers: Dict[str, str] = {
+            "Content-Type": MSGPACK_CONTENT_TYPE,
+            "Accept": MSGPACK_CONTENT_TYPE,
+        }
+        self._json_headers: Dict[str, str] = {"Content-Type": JSON_CONTENT_TYPE}
+        # Page-locked host buffers for observations that live on the GPU, allocated on first use
+        self._pinned: Dict[str, Tensor] = {}
+        # Side stream for device-to-host copies so they do not queue behind unrelated GPU work
+        self._copy_stream: Optional[torch.cuda.Stream] = None
+        # Remaining actions of the last sequence returned by the server (action_horizon > 1)
+        self._action_queue: deque[Tensor] = deque()
         self.closed: bool = False
 
     def __enter__(self) -> "RemotePolicyClient":
@@ -63,49 +147,86 @@ class RemotePolicyClient:
         """
         Send a batch of observations to the server and return the predicted action.
 
+        With `action_horizon > 1`, the server is only queried once the actions it returned for a
+        previous observation have all been handed out; `observations` is ignored until then.
+
         Args:
             observations: Mapping from feature names to Torch Tensors.
         Returns:
             Torch Tensor of actions returned by the server.
         """
-        # Convert tensors to Python lists (on CPU)
-        inputs: Dict[str, Any] = {}
-        for name, tensor in observations.items():
-            if not isinstance(tensor, Tensor):
-                raise TypeError(f"Expected Tensor for observation '{name}', got {type(tensor)}")
-            inputs[name] = tensor.detach().cpu().tolist()
+        if self._action_queue:
+            return self._action_queue.popleft()
+        action_tensor = self._predict(observations)
+        if self.config.action_horizon > 1:
+            horizon = self.config.action_horizon
+            if action_tensor.ndim < 2 or action_tensor.shape[0] < horizon:
+                logger.error(f"Expected {horizon} actions, got shape {tuple(action_tensor.shape)}")
+                raise RuntimeError(
+                    f"RemotePolicyClient: server returned fewer than action_horizon={horizon} actions"
+                )
+            # Leading dimension is time: keep the rest of the sequence for the following calls
+            self._action_queue.extend(action_tensor[1:horizon])
+            return action_tensor[0]
+        return action_tensor
+
+    def reset(self) -> None:
+        """
+        Drop actions still queued from the last server reply, e.g. at the start of an episode.
+        """
+        self._action_queue.clear()
+
+    def _predict(self, observations: Dict[str, Tensor]) -> Tensor:
+        use_msgpack = self.config.content_type == MSGPACK_CONTENT_TYPE
+        # Convert host arrays to raw bytes (msgpack); the JSON encoder writes them as lists
+        host = self._to_host(observations)
+        inputs: Dict[str, Any] = {
+            name: _pack_array(array) if use_msgpack else array for name, array in host.items()
+        }
 
         payload: Dict[str, Any] = {
             "model": self.config.model_name,
             "inputs": inputs,
         }
+        if self.config.action_horizon > 1:
+            payload["action_horizon"] = self.config.action_horizon
+        if use_msgpack:
+            body, headers = msgpack.packb(payload, use_bin_type=True), self._msgpack_headers
+        else:
+            body, headers = _dumps_json(payload), self._json_headers
 
-        url = f"{self.config.endpoint.rstrip('/')}/predict"
+        url = self._predict_url
         logger.debug(f"RemotePolicyClient: POST {url} payload keys: {list(payload.keys())}")
         last_exc: Optional[Exception] = None
         for attempt in range(1, self.config.max_retries + 1):
             try:
-                resp = self.session.post(url, json=payload, timeout=self.config.timeout)
-                resp.raise_for_status()
+                resp = self.http.request("POST", url, body=body, headers=headers, timeout=self.config.timeout)
+                _raise_for_status(resp)
                 break
-            except requests.RequestException as exc:
+            except urllib3.exceptions.HTTPError as exc:
                 last_exc = exc
-                wait = self.config.backoff_factor * (2 ** (attempt - 1))
-                jitter = random.uniform(0, wait)
-                delay = wait + jitter
+                # No jitter: a single robot client gains nothing from it and a real-time loop needs a bound
+                delay = min(self.config.backoff_factor * (2 ** (attempt - 1)), self.config.max_backoff)
                 logger.warning(f"Attempt {attempt}/{self.config.max_retries} failed: {exc}. Retrying in {delay:.2f}s.")
                 time.sleep(delay)
         else:
             logger.error(f"All {self.config.max_retries} retry attempts failed.")
             raise RuntimeError(f"RemotePolicyClient: failed to get response after {self.config.max_retries} attempts") from last_exc
 
-        logger.debug(f"Received response status: {resp.status_code}")
+        logger.debug(f"Received response status: {resp.status}")
 
-        try:
-            data: Dict[str, Any] = resp.json()
-        except ValueError as exc:
-            logger.error(f"Invalid JSON response: {resp.text}")
-            raise RuntimeError("RemotePolicyClient: invalid JSON in response") from exc
+        if resp.headers.get("Content-Type", "").startswith(MSGPACK_CONTENT_TYPE):
+            try:
+                data: Dict[str, Any] = msgpack.unpackb(resp.data, raw=False)
+            except ValueError as exc:
+                logger.error(f"Invalid msgpack response of {len(resp.data)} bytes")
+                raise RuntimeError("RemotePolicyClient: invalid msgpack in response") from exc
+        else:
+            try:
+                data = _loads_json(resp.data)
+            except ValueError as exc:
+                logger.error(f"Invalid JSON response: {resp.data.decode(errors='replace')}")
+                raise RuntimeError("RemotePolicyClient: invalid JSON in response") from exc
 
         action_list = data.get("action")
         if action_list is None:
@@ -113,32 +234,70 @@ class RemotePolicyClient:
             raise KeyError("RemotePolicyClient: 'action' key not in response JSON")
 
         try:
-            action_tensor: Tensor = torch.tensor(action_list, dtype=torch.float32)
+            if isinstance(action_list, dict):
+                action_tensor: Tensor = _unpack_tensor(action_list)
+            else:
+                action_tensor = torch.tensor(action_list, dtype=torch.float32)
         except Exception as exc:
             logger.error(f"Failed to convert action list to Tensor: {action_list}")
             raise RuntimeError("RemotePolicyClient: failed to build action tensor") from exc
         logger.debug(f"Action tensor shape: {action_tensor.shape}")
         return action_tensor
 
+    def _to_host(self, observations: Dict[str, Tensor]) -> Dict[str, np.ndarray]:
+        """
+        View observations as host numpy arrays. CUDA tensors are copied asynchronously into reusable
+        pinned buffers on a dedicated copy stream, and the host waits once on an event recorded after
+        the last copy, instead of one blocking `.cpu()` per tensor.
+        """
+        host: Dict[str, np.ndarray] = {}
+        copying = False
+        for name, tensor in observations.items():
+            if not isinstance(tensor, Tensor):
+                raise TypeError(f"Expected Tensor for observation '{name}', got {type(tensor)}")
+            tensor = tensor.detach()
+            dtype = torch.float32 if tensor.dtype in _NON_NUMPY_DTYPES else tensor.dtype
+            if tensor.is_cuda:
+                if not copying:
+                    if self._copy_stream is None:
+                        self._copy_stream = torch.cuda.Stream(device=tensor.device)
+                    # The copies must see everything already queued to produce the observations
+                    self._copy_stream.wait_stream(torch.cuda.current_stream(tensor.device))
+                    copying = True
+                pinned = self._pinned.get(name)
+                if pinned is None or pinned.shape != tensor.shape or pinned.dtype != dtype:
+                    pinned = torch.empty(tensor.shape, dtype=dtype, pin_memory=True)
+                    self._pinned[name] = pinned
+                with torch.cuda.stream(self._copy_stream):
+                    # Converts to the buffer dtype on the device, as part of the copy
+                    pinned.copy_(tensor, non_blocking=True)
+                tensor = pinned
+            elif tensor.device.type != "cpu":
+                # Other accelerators (mps, xpu) are copied to the host synchronously
+                tensor = tensor.to("cpu", dtype)
+            host[name] = tensor.to(dtype).numpy()
+        if copying:
+            self._copy_stream.record_event().synchronize()
+        return host
+
     def close(self) -> None:
         """
-        Close the underlying HTTP session.
+        Close the pooled HTTP connections.
         """
         if not self.closed:
-            self.session.close()
+            self.http.clear()
             self.closed = True
-            logger.info("RemotePolicyClient session closed")
+            logger.info("RemotePolicyClient connection pool closed")
 
     def health_check(self) -> bool:
         """
         Check server availability via /health endpoint.
         Returns True if server responds 200.
         """
-        url = f"{self.config.endpoint.rstrip('/')}/health"
         try:
-            resp = self.session.get(url, timeout=self.config.timeout)
-            resp.raise_for_status()
+            resp = self.http.request("GET", self._health_url, timeout=self.config.timeout)
+            _raise_for_status(resp)
             return True
-        except requests.RequestException as e:
+        except urllib3.exceptions.HTTPError as e:
             logger.warning(f"Health check failed: {e}")
             return False
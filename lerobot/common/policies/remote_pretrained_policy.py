@@ -55,6 +55,12 @@ class RemotePreTrainedPolicy(PreTrainedPolicy):
         # Delegate to RemotePolicyClient
         return self.client.select_action(batch)
 
+    def reset(self):
+        """
+        Drop any actions the remote client still holds from the previous episode.
+        """
+        self.client.reset()
+
     def forward(self, batch: dict[str, Tensor]):
         """
         Remote forward is same as select_action. Returns (action, None)
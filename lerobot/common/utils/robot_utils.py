@@ -30,6 +30,22 @@ def busy_wait(seconds):
             time.sleep(seconds)
 
 
+def hybrid_wait(seconds, spin=300e-6):
+    """Sleep for most of `seconds`, then busy-spin the last `spin` seconds.
+
+    The final spin absorbs the wake-up latency of `time.sleep`, so ticks end on time on every platform. On
+    macOS this matches the accuracy of `busy_wait` while leaving the CPU idle for most of the period; on
+    Linux, where `busy_wait` only sleeps, it trades up to `spin` seconds of busy CPU per call for tighter
+    ticks.
+    """
+    end_time = time.perf_counter() + seconds
+    coarse = seconds - spin
+    if coarse > 0:
+        time.sleep(coarse)
+    while time.perf_counter() < end_time:
+        pass
+
+
 def safe_disconnect(func):
     # TODO(aliberts): Allow to pass custom exceptions
     # (e.g. ThreadServiceExit, KeyboardInterrupt, SystemExit, UnpluggedError, DynamixelCommError)
@@ -0,0 +1,28 @@
+"""Numba-jitted kernels for the remote inference action path."""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def clip_action(action, low, high):
+    """Clip each row of a 2-D `action` to ``[low, high]`` element-wise and return it as a new float32 array.
+
+    `low` and `high` must have one entry per column; the caller checks this, the kernel does not.
+    """
+    out = np.empty(action.shape, dtype=np.float32)
+    for i in range(action.shape[0]):
+        for j in range(action.shape[1]):
+            value = action[i, j]
+            if value < low[j]:
+                value = low[j]
+            elif value > high[j]:
+                value = high[j]
+            out[i, j] = value
+    return out
+
+
+# Compile the float32 specialization now so the first control tick does not pay for it
+_warmup = np.zeros(1, dtype=np.float32)
+clip_action(_warmup.reshape(1, 1), _warmup, _warmup)
+del _warmup
@@ -1,62 +1,114 @@
+import collections
 import logging
+import math
+import struct
+import threading
+import uuid
 import zmq
 import numpy as np
 import time
 from typing import Dict, Any
 
+from . import _ops, serial
 from .config import RemoteInferenceConfig
 
 logger = logging.getLogger(__name__)
 
+# Every request and reply starts with this frame so pipelined replies can be matched to their request
+_REQ_ID = struct.Struct("<Q")
+
+
+def _is_frame(value: Any, shape: tuple | None = None) -> bool:
+    """Whether `value` is a uint8 HxWxC camera frame (of the given `shape`, if any)."""
+    if not isinstance(value, np.ndarray) or value.dtype != np.uint8 or value.ndim != 3:
+        return False
+    return shape is None or value.shape == shape
+
+
+def _resolve_feature_names(config: RemoteInferenceConfig) -> tuple[str, ...] | None:
+    if config.action_feature_names is not None:
+        return tuple(config.action_feature_names)
+    if config.robot_config is None:
+        return None
+    # Only `action_features` is needed; the robot is not connected and is dropped right away
+    from lerobot.common.robots.utils import make_robot_from_config
+
+    return tuple(make_robot_from_config(config.robot_config).action_features)
+
+
 class RemoteInferenceClient:
     """Client that sends observations to remote server for inference."""
     # Dynamically map actions using robot_config.action_features
 
     def __init__(self, config: RemoteInferenceConfig):
         self.config = config
-        # If robot_config provided, instantiate a robot stub to get action feature names
-        if config.robot_config:
-            from lerobot.common.robots.utils import make_robot_from_config
-
-            self._robot_stub = make_robot_from_config(config.robot_config)
+        # Action feature names never change for a given robot, resolve them once
+        self._feature_names = _resolve_feature_names(config)
+        if config.action_low is not None and config.action_high is not None:
+            self._action_bounds = (
+                np.asarray(config.action_low, dtype=np.float32),
+                np.asarray(config.action_high, dtype=np.float32),
+            )
         else:
-            self._robot_stub = None
+            self._action_bounds = None
+        # Zero action returned on timeouts and errors, built on the first fallback (see `_fallback_action`)
+        self._zero_action = None
         
-        # Initialize ZMQ client
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REQ)
-        self.socket.RCVTIMEO = config.timeout_ms
+        # Initialize ZMQ client. DEALER lets the next observation go out before the previous action returns
+        # The process-wide context is shared by all clients, so creating one does not start new IO threads
+        self.context = zmq.Context.instance()
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.setsockopt(zmq.IDENTITY, uuid.uuid4().bytes)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        # Only queue messages on a completed connection, so a dead server fails fast instead of buffering
+        self.socket.setsockopt(zmq.IMMEDIATE, 1)
+        self.socket.setsockopt(zmq.SNDTIMEO, config.timeout_ms)
+        # Same keepalive as the server, so NAT entries on either side of a remote link stay open
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE_IDLE, 30)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE_INTVL, 5)
+        # Replies are awaited with a poller so stale replies do not restart the timeout
+        self._poller = zmq.Poller()
+        self._poller.register(self.socket, zmq.POLLIN)
+        self._last_req_id = 0
         
-        # Connect to server
-        self.socket.connect(f"tcp://{config.server_host}:{config.server_port}")
-        logger.info(f"Connected to server at {config.server_host}:{config.server_port}")
+        # Connect to server. With the "ipc" transport a unix socket skips the loopback TCP stack
+        if config.transport == "inproc":
+            self.endpoint = config.inproc_endpoint
+        elif config.transport == "ipc":
+            if not zmq.has("ipc"):
+                raise ValueError("The ipc transport is not supported by this zmq build, use tcp instead")
+            self.endpoint = config.ipc_endpoint
+        else:
+            self.endpoint = f"tcp://{config.server_host}:{config.server_port}"
+        self.socket.connect(self.endpoint)
+        logger.info(f"Connected to server at {self.endpoint}")
         # Store robot type for server side
         self.robot_type = config.robot_config.type if config.robot_config else None
+        # Fields that are the same in every request, merged into each observation
+        self._static_fields: Dict[str, Any] = {}
+        if config.text_prompt is not None:
+            self._static_fields["task"] = config.text_prompt
+        if self.robot_type:
+            self._static_fields["robot_type"] = self.robot_type
+        self._encoder = serial.Encoder(single_float=True, half_float=config.wire_dtype)
+        # Camera frames are copied into one reusable buffer and sent as a single frame
+        self._img_slots = None
+        self._img_tracker = None
+        # Background exchange (see `start_background`): newest observation in, newest action out
+        self._obs_slot = collections.deque(maxlen=1)
+        self._obs_ready = threading.Event()
+        self._pump_stop = threading.Event()
+        self._pump_thread = None
+        self._latest_action = None
         
     def __call__(self, observation: Dict[str, Any]) -> Dict[str, float]:
         """Send observation to inference server, retry on timeout, and return action dictionary."""
-        # Convert numpy arrays to lists for JSON serialization
-        obs_serializable = {k: v.tolist() if isinstance(v, np.ndarray) else v for k,v in observation.items()}
-        # Attach optional text prompt and robot_type
-        if self.config.text_prompt is not None:
-            obs_serializable["task"] = self.config.text_prompt
-        if self.robot_type:
-            obs_serializable["robot_type"] = self.robot_type
-            
-        # Retry on timeout with backoff
+        # Retry on timeout with backoff; replies to abandoned requests are dropped by id
         for attempt in range(3):
             try:
-                self.socket.send_json(obs_serializable)
-                response = self.socket.recv_json()
-                if response.get("status") != "success":
-                    raise RuntimeError(f"Server error: {response.get('error')}")
-                action_np = np.array(response["action"])
-                # Map array to features dynamically
-                if self._robot_stub:
-                    feature_names = list(self._robot_stub.action_features.keys())
-                    return {name: float(action_np[i]) for i, name in enumerate(feature_names)}
-                # Fallback: return raw numpy array
-                return action_np
+                req_id = self.submit(observation)
+                return self._wait_action(req_id)
             except zmq.error.Again:
                 logger.warning(f"Timeout, retrying {attempt+1}/3...")
                 time.sleep(0.1 * (2 ** attempt))
@@ -64,12 +116,200 @@ class RemoteInferenceClient:
                 logger.error(f"Inference error: {e}")
                 break
         # After retries or on failure, return neutral defaults
-        if self._robot_stub:
-            feature_names = list(self._robot_stub.action_features.keys())
-            return {name: 0.0 for name in feature_names}
-        return np.zeros(())
-            
+        return self._fallback_action()
+
+    @staticmethod
+    def prepare_obs_buffer(schema: Dict[str, tuple]) -> Dict[str, np.ndarray]:
+        """Allocate reusable observation arrays from `schema`, a ``{name: (shape, dtype)}`` mapping.
+
+        Fill them in place every tick (``buffers[name][:] = value`` or `np.copyto`) and pass the dict to
+        `__call__`, `submit` or `push_observation` instead of building new arrays. Large arrays are sent
+        without copying, so with `__call__` and `submit` only refill them once the action for the previous
+        request has been received; `push_observation` copies them, so they can be refilled as soon as it
+        returns. Camera frames do not need this: the client already copies them into its own staging buffer.
+        """
+        return {name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in schema.items()}
+
+    def submit(self, observation: Dict[str, Any]) -> int:
+        """Send an observation without waiting for the reply and return its request id.
+
+        Several requests can be in flight at once; collect each action with `recv_action`. Raises
+        `zmq.Again` when the request cannot be queued within `timeout_ms`.
+        """
+        # Numpy arrays are sent as raw buffers alongside the msgpack header (see `serial`). Camera frames
+        # stay uint8 on the wire and float state is narrowed to float32; the server dequantizes images.
+        # Attach optional text prompt and robot_type
+        obs_serializable = {**observation, **self._static_fields}
+        if self.config.compress_images:
+            self._compress_images(obs_serializable)
+        else:
+            self._stage_images(obs_serializable)
+
+        self._last_req_id += 1
+        self._img_tracker = self.socket.send_multipart(
+            [_REQ_ID.pack(self._last_req_id), *self._encoder.encode(obs_serializable)],
+            copy=False,
+            track=True,
+        )
+        return self._last_req_id
+
+    def recv_action(self, req_id: int) -> Dict[str, float]:
+        """Wait for the action answering `req_id`, returning neutral defaults on timeout or error."""
+        try:
+            return self._wait_action(req_id)
+        except zmq.error.Again:
+            logger.warning(f"Timeout waiting for request {req_id}")
+        except Exception as e:
+            logger.error(f"Inference error: {e}")
+        return self._fallback_action()
+
+    def start_background(self) -> None:
+        """Run the request/reply exchange in a background thread.
+
+        The control loop then calls `push_observation` and `latest_action` and never blocks on the
+        network: when inference takes longer than a control period, the newest observation replaces any
+        one still waiting and the robot keeps receiving the most recent action. The socket belongs to the
+        background thread until `stop_background` (or `close`) is called.
+        """
+        if self._pump_thread is not None:
+            return
+        self._pump_stop.clear()
+        self._pump_thread = threading.Thread(target=self._pump, name="remote-inference-pump", daemon=True)
+        self._pump_thread.start()
+
+    def stop_background(self) -> None:
+        """Stop the background exchange started with `start_background`."""
+        if self._pump_thread is None:
+            return
+        self._pump_stop.set()
+        self._pump_thread.join()
+        self._pump_thread = None
+
+    def push_observation(self, observation: Dict[str, Any]) -> None:
+        """Hand the newest observation to the background thread, dropping any not yet sent."""
+        # The background thread sends the arrays later and without copying, while the caller may already be
+        # refilling them (see `prepare_obs_buffer`). Camera frames are copied into the staging buffer instead
+        observation = {
+            key: value.copy() if isinstance(value, np.ndarray) and not _is_frame(value) else value
+            for key, value in observation.items()
+        }
+        self._obs_slot.append(observation)
+        self._obs_ready.set()
+
+    def latest_action(self) -> Dict[str, float] | None:
+        """Return the most recent action from the background thread, or None before the first reply."""
+        return self._latest_action
+
+    def _pump(self) -> None:
+        while not self._pump_stop.is_set():
+            if not self._obs_ready.wait(timeout=0.1):
+                continue
+            self._obs_ready.clear()
+            try:
+                observation = self._obs_slot.pop()
+            except IndexError:
+                continue
+            # On a timeout or an error the previous action is kept: the fallback zeros of `__call__` would
+            # drive the robot to an all-zero pose, and the next observation gets a fresh request anyway
+            try:
+                self._latest_action = self._wait_action(self.submit(observation))
+            except zmq.error.Again:
+                logger.warning("Timeout waiting for an action, keeping the previous one")
+            except Exception as e:
+                logger.error(f"Inference error: {e}")
+
+    def _wait_action(self, req_id: int) -> Dict[str, float]:
+        deadline = time.monotonic() + self.config.timeout_ms / 1000
+        while True:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0 or not self._poller.poll(remaining_ms):
+                raise zmq.error.Again()
+            frames = self.socket.recv_multipart(copy=False)
+            reply_id = _REQ_ID.unpack(frames[0])[0]
+            if reply_id == req_id:
+                break
+            logger.debug(f"Dropping stale reply to request {reply_id}")
+        response = serial.decode(frames[1:])
+        if response.get("status") != "success":
+            raise RuntimeError(f"Server error: {response.get('error')}")
+        # Already a typed ndarray viewing the reply frame (see `serial.decode`), no copy needed
+        action_np = np.asarray(response["action"])
+        if self._action_bounds is not None:
+            action_np = self._clip_action(action_np)
+        # Map array to features dynamically
+        if self._feature_names:
+            return dict(zip(self._feature_names, action_np.tolist(), strict=True))
+        # Fallback: return raw (read-only) numpy array
+        return action_np
+
+    def _clip_action(self, action: np.ndarray) -> np.ndarray:
+        """Clip `action` to the configured bounds along its last dimension, keeping its shape."""
+        low, high = self._action_bounds
+        if action.ndim == 0 or action.shape[-1] != low.shape[0]:
+            raise ValueError(
+                f"Action of shape {action.shape} does not match the {low.shape[0]} "
+                "action_low/action_high bounds"
+            )
+        # Chunked actions are clipped row by row against the same bounds
+        clipped = _ops.clip_action(action.reshape(-1, low.shape[0]), low, high)
+        return clipped.reshape(action.shape)
+
+    def _fallback_action(self) -> Dict[str, float]:
+        if self._feature_names:
+            return dict.fromkeys(self._feature_names, 0.0)
+        if self._zero_action is None:
+            output_features = getattr(self.config.policy_config, "output_features", None)
+            shape = next(iter(output_features.values())).shape if output_features else ()
+            self._zero_action = np.zeros(shape, dtype=np.float32)
+            # Shared by every fallback, so callers must not modify it in place
+            self._zero_action.flags.writeable = False
+        return self._zero_action
+
+    def _compress_images(self, observation: Dict[str, Any]) -> None:
+        """Replace uint8 HxWx3 frames with their JPEG encoding."""
+        for key, value in observation.items():
+            is_rgb = isinstance(value, np.ndarray) and value.ndim == 3 and value.shape[-1] == 3
+            if is_rgb and value.dtype == np.uint8:
+                observation[key] = serial.encode_jpeg(value, self.config.jpeg_quality)
+
+    def _stage_images(self, observation: Dict[str, Any]) -> None:
+        """Copy uint8 HxWxC frames into the staging buffer and replace them with views on it.
+
+        The camera layout is resolved on the first call and reused while the same frames keep arriving,
+        so the steady state is one check and one copy per camera.
+        """
+        slots = self._img_slots
+        if slots is None or not all(_is_frame(observation.get(key), shape) for key, shape, _, _ in slots):
+            slots = self._build_img_slots(observation)
+            if not slots:
+                return
+        elif self._img_tracker is not None:
+            # zmq may still reference the previous frame until it is handed to the kernel. A hung server
+            # can keep it queued, so this wait is bounded like the reply wait
+            try:
+                self._img_tracker.wait(timeout=self.config.timeout_ms / 1000)
+            except zmq.error.NotDone:
+                raise zmq.error.Again() from None
+        for key, _, target, staged in slots:
+            np.copyto(target, observation[key])
+            observation[key] = staged
+
+    def _build_img_slots(self, observation: Dict[str, Any]) -> list:
+        layout = [(k, v.shape) for k, v in sorted(observation.items()) if _is_frame(v)]
+        staging = np.empty(sum(math.prod(shape) for _, shape in layout), dtype=np.uint8)
+        slots = []
+        offset = 0
+        for key, shape in layout:
+            size = math.prod(shape)
+            target = staging[offset : offset + size].reshape(shape)
+            slots.append((key, shape, target, serial.StagedArray(staging, offset, np.uint8, shape)))
+            offset += size
+        self._img_slots = slots or None
+        self._img_tracker = None
+        return slots
+
     def close(self):
         """Close connection to server."""
+        self.stop_background()
+        # LINGER=0 lets this return at once; the shared context stays alive for other clients
         self.socket.close()
-        self.context.term()
@@ -1,6 +1,12 @@
+import tempfile
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Optional
 
+from huggingface_hub import hf_hub_download
+from huggingface_hub.constants import CONFIG_NAME
+from huggingface_hub.errors import LocalEntryNotFoundError
+
 from lerobot.common.robots.config import RobotConfig
 from lerobot.configs.policies import PreTrainedConfig
 
@@ -11,8 +17,48 @@ class RemoteInferenceConfig:
     server_host: str = "localhost"
     server_port: int = 5555
     timeout_ms: int = 1000
+    # "tcp" (default), "ipc" to reach a server on the same machine over a unix socket instead of loopback
+    # TCP, or "inproc" when client and server run in the same process (tests, embedded servers). A tcp or
+    # ipc server accepts both kinds of clients. inproc bypasses the network stack entirely; both sides then
+    # use the process-wide zmq context. Only use "ipc" when the server really runs on this machine: a
+    # localhost port forwarded by `ssh -L` or `docker run -p` needs "tcp"
+    transport: str = "tcp"
+    # Server-side micro-batching: requests arriving within `max_batch_delay_ms` of each other are run as one
+    # policy call, up to `max_batch_size`. Only stateless policies should be batched across clients.
+    max_batch_size: int = 1
+    max_batch_delay_ms: float = 2.0
+    # Decode the next requests on a background thread while the policy runs on the current batch. Helps
+    # most with JPEG frames (`compress_images`), whose decoding releases the GIL
+    decode_in_background: bool = False
+    # Pin the serving thread to this CPU core (Linux only) to avoid migrations between cores. The decode
+    # thread keeps every core, and so do torch's CPU worker threads if the warmup started them (it needs the
+    # policy's input features); otherwise they start later and share the pinned core
+    server_cpu_affinity: int | None = None
+    # Compile the policy's `select_action` with torch.compile on the server, warmed up before serving
+    compile_policy: bool = False
+    compile_mode: str = "reduce-overhead"
+    # Fail compilation on graph breaks instead of falling back to eager for the unsupported parts
+    compile_fullgraph: bool = False
+    # Capture the server's single-request inference as a CUDA graph and replay it. Only valid for policies
+    # whose `select_action` is a pure function of a fixed-shape input (no internal action queue)
+    use_cuda_graphs: bool = False
+    # Cast the served policy's weights to "bfloat16" or "float16" on CUDA devices (None keeps float32)
+    policy_dtype: str | None = None
+    # Store the policy's convolution weights and image inputs channels-last (NHWC) on the server
+    channels_last: bool = False
     # Optional text prompt for policies that support text-based conditioning
     text_prompt: str | None = None
+    # Optional per-dimension action limits; server actions are clipped to [action_low, action_high]
+    action_low: list[float] | None = None
+    action_high: list[float] | None = None
+    # Send RGB camera frames as JPEG instead of raw pixels, for bandwidth-limited links such as WiFi
+    compress_images: bool = False
+    jpeg_quality: int = 85
+    # Send float observation arrays as "float16" or "bfloat16" to halve their size on the wire (None keeps
+    # float32). The server widens them back to float32. Precision is reduced, and float16 only holds
+    # magnitudes up to 65504: arrays with larger values (e.g. unnormalized encoder counts or depth) are sent
+    # as float32
+    wire_dtype: str | None = None
     
     # Policy configuration
     policy_path: str = field(
@@ -20,16 +66,54 @@ class RemoteInferenceConfig:
         metadata={"help": "Path to the policy model on the HF Hub or local checkpoint"}
     )
     policy_config: Optional[PreTrainedConfig] = None
+    # Read the policy config of a Hub `policy_path` from the local cache when it is there, so restarts do
+    # not query the Hub. A new config pushed to the Hub is not picked up while one is cached.
+    prefer_local_policy: bool = False
     
     # Robot configuration 
     robot_config: Optional[RobotConfig] = None
+    # Action feature names, in the order of the policy's action vector. Pass `list(robot.action_features)`
+    # when the robot already exists; otherwise the client builds a throwaway robot from `robot_config`
+    action_feature_names: Optional[list[str]] = None
+
+    @property
+    def ipc_endpoint(self) -> str:
+        """Unix socket endpoint the server also binds, used by clients with `transport` "ipc"."""
+        return f"ipc://{tempfile.gettempdir()}/lerobot-{self.server_port}.sock"
+
+    @property
+    def inproc_endpoint(self) -> str:
+        """In-process endpoint used instead of TCP when `transport` is "inproc"."""
+        return f"inproc://lerobot-{self.server_port}"
 
     def __post_init__(self):
         if not self.policy_path:
             raise ValueError("policy_path must be specified")
+        if self.transport not in ("tcp", "ipc", "inproc"):
+            raise ValueError(f"transport must be 'tcp', 'ipc' or 'inproc', got {self.transport!r}")
+        if (self.action_low is None) != (self.action_high is None):
+            raise ValueError("action_low and action_high must be given together")
+        if self.action_low is not None and len(self.action_low) != len(self.action_high):
+            raise ValueError(
+                f"action_low and action_high must have the same length, got {len(self.action_low)} "
+                f"and {len(self.action_high)}"
+            )
+        if self.prefer_local_policy:
+            self.policy_path = resolve_policy_path(self.policy_path)
         # If no policy_config provided, load from pretrained path
         if self.policy_config is None:
             from lerobot.configs.policies import PreTrainedConfig
             self.policy_config = PreTrainedConfig.from_pretrained(self.policy_path)
         # robot_config requirement removed to allow server-only configuration
         # Robot configuration is only needed on the client side
+
+
+def resolve_policy_path(policy_path: str) -> str:
+    """Local directory holding the policy's config, downloading only that file if it is not cached yet."""
+    if Path(policy_path).is_dir():
+        return policy_path
+    try:
+        config_file = hf_hub_download(policy_path, CONFIG_NAME, local_files_only=True)
+    except LocalEntryNotFoundError:
+        config_file = hf_hub_download(policy_path, CONFIG_NAME)
+    return str(Path(config_file).parent)
@@ -0,0 +1,171 @@
+"""Binary wire format shared by the remote inference client and server.
+
+Messages are packed with msgpack. NumPy arrays are never inlined in the msgpack header: each array is
+replaced by a small ``{"__nd__": index, "dtype": ..., "shape": ...}`` reference and its raw buffer is sent
+as an extra ZMQ frame. Sending the frames with ``send_multipart(frames, copy=False)`` lets zmq use the
+array memory directly, and the receiver rebuilds the arrays with ``np.frombuffer`` without copying.
+
+Several arrays may share one frame: a `StagedArray` points at a region of a larger staging buffer, and the
+buffer itself is only sent once per message.
+
+Camera frames wrapped in a `JpegImage` travel as JPEG bytes in their own frame, referenced by
+``{"__jpeg__": index, "shape": ...}``, and are decoded back to RGB ``uint8`` arrays on receipt.
+
+Float arrays can be narrowed to 16 bits on the wire (see `Encoder`). Their reference carries ``"half": true``
+and they are widened back to ``float32`` on receipt; bfloat16 values travel as their ``uint16`` bit patterns.
+"""
+
+import math
+from typing import Any, List
+
+import cv2
+import msgpack
+import numpy as np
+
+ND_KEY = "__nd__"
+JPEG_KEY = "__jpeg__"
+HALF_FLOAT_DTYPES = ("float16", "bfloat16")
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+class StagedArray:
+    """Array stored at byte `offset` of a flat ``uint8`` staging `buffer` shared with other arrays."""
+
+    __slots__ = ("buffer", "offset", "dtype", "shape")
+
+    def __init__(self, buffer: np.ndarray, offset: int, dtype: np.dtype, shape: tuple):
+        self.buffer = buffer
+        self.offset = offset
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+
+
+class JpegImage:
+    """RGB ``uint8`` HxWx3 frame compressed to JPEG bytes, see `encode_jpeg`."""
+
+    __slots__ = ("data", "shape")
+
+    def __init__(self, data: np.ndarray, shape: tuple):
+        self.data = data
+        self.shape = tuple(shape)
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 85) -> JpegImage:
+    """Compress an RGB ``uint8`` HxWx3 frame to JPEG."""
+    bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    ok, data = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"Failed to JPEG-encode image of shape {image.shape}")
+    return JpegImage(data, image.shape)
+
+
+def _narrow(array: np.ndarray, dtype: str) -> np.ndarray | None:
+    """16-bit wire representation of a float array: float16, or the upper half of float32 for bfloat16.
+
+    Returns None when float16 cannot hold the values, which overflow to infinity above 65504.
+    """
+    if dtype == "float16":
+        if array.size and np.abs(array).max() > _FLOAT16_MAX:
+            return None
+        return np.ascontiguousarray(array, dtype=np.float16)
+    bits = np.ascontiguousarray(array, dtype=np.float32).view(np.uint32)
+    # Round to nearest even before dropping the low 16 bits of the mantissa
+    rounded = bits + np.uint32(0x7FFF) + ((bits >> 16) & np.uint32(1))
+    return (rounded >> 16).astype(np.uint16)
+
+
+def _widen(array: np.ndarray) -> np.ndarray:
+    """Inverse of `_narrow`; the dtype tells float16 (``<f2``) from bfloat16 bits (``<u2``) apart."""
+    if array.dtype == np.float16:
+        return array.astype(np.float32)
+    return (array.astype(np.uint32) << 16).view(np.float32)
+
+
+def _as_buffer(frame: Any) -> Any:
+    # zmq.Frame (received with copy=False) exposes its memory through `.buffer`
+    return getattr(frame, "buffer", frame)
+
+
+class Encoder:
+    """Reusable `encode`: keeps one msgpack ``Packer`` instead of setting one up for every message.
+
+    With `single_float`, Python floats and float64 arrays are sent as float32, which is what policies
+    consume anyway. With `half_float` ("float16" or "bfloat16"), float arrays are sent in that 16-bit type
+    instead, halving their size, and arrive as float32; arrays outside the float16 range (magnitudes above
+    65504, e.g. unnormalized encoder counts or depth) are sent as with `half_float` unset. Integer arrays
+    (uint8 images in particular) are always sent in their own dtype. An encoder is not thread-safe; use one
+    per sending thread.
+    """
+
+    def __init__(self, single_float: bool = False, half_float: str | None = None):
+        if half_float is not None and half_float not in HALF_FLOAT_DTYPES:
+            raise ValueError(f"half_float must be one of {HALF_FLOAT_DTYPES}, got {half_float!r}")
+        self.single_float = single_float
+        self.half_float = half_float
+        self._buffers: List[Any] = []
+        self._staged: dict = {}
+        self._packer = msgpack.Packer(default=self._default, use_bin_type=True, use_single_float=single_float)
+
+    def encode(self, obj: Any) -> List[Any]:
+        """Serialize `obj` into ``[header, *buffers]``, ready for ``socket.send_multipart``."""
+        self._buffers = []
+        self._staged.clear()
+        header = self._packer.pack(obj)
+        return [header, *self._buffers]
+
+    def _default(self, value: Any) -> Any:
+        buffers = self._buffers
+        if isinstance(value, JpegImage):
+            buffers.append(value.data.data)
+            return {JPEG_KEY: len(buffers), "shape": value.shape}
+        if isinstance(value, StagedArray):
+            index = self._staged.get(id(value.buffer))
+            if index is None:
+                buffers.append(value.buffer.data)
+                index = self._staged[id(value.buffer)] = len(buffers)
+            return {ND_KEY: index, "dtype": value.dtype.str, "shape": value.shape, "offset": value.offset}
+        if isinstance(value, np.ndarray):
+            shape = value.shape
+            narrowed = None
+            if self.half_float is not None and value.dtype.kind == "f":
+                narrowed = _narrow(value, self.half_float)
+            if narrowed is not None:
+                buffers.append(narrowed.data)
+                return {ND_KEY: len(buffers), "dtype": narrowed.dtype.str, "shape": shape, "half": True}
+            if self.single_float and value.dtype == np.float64:
+                value = value.astype(np.float32)
+            buffers.append(np.ascontiguousarray(value).data)
+            return {ND_KEY: len(buffers), "dtype": value.dtype.str, "shape": shape}
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Cannot serialize object of type {type(value)}")
+
+
+def encode(obj: Any, single_float: bool = False) -> List[Any]:
+    """Serialize `obj` into ``[header, *buffers]``, ready for ``socket.send_multipart``. See `Encoder`."""
+    return Encoder(single_float).encode(obj)
+
+
+def decode(frames: List[Any]) -> Any:
+    """Rebuild an object produced by `encode`.
+
+    Arrays are read-only views over the received frames, except narrowed float arrays (see `Encoder`),
+    which are widened into new float32 arrays.
+    """
+
+    def object_hook(obj: dict) -> Any:
+        if JPEG_KEY in obj:
+            data = np.frombuffer(_as_buffer(frames[obj[JPEG_KEY]]), dtype=np.uint8)
+            return cv2.cvtColor(cv2.imdecode(data, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+        if ND_KEY in obj:
+            buffer = _as_buffer(frames[obj[ND_KEY]])
+            dtype, shape = np.dtype(obj["dtype"]), obj["shape"]
+            if "offset" in obj:
+                array = np.frombuffer(buffer, dtype=dtype, count=math.prod(shape), offset=obj["offset"])
+            else:
+                array = np.frombuffer(buffer, dtype=dtype)
+            array = array.reshape(shape)
+            return _widen(array) if obj.get("half") else array
+        return obj
+
+    return msgpack.unpackb(_as_buffer(frames[0]), object_hook=object_hook, raw=False)
@@ -1,27 +1,103 @@
 import logging
+import os
+import threading
+import time
 import zmq
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import numpy as np
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import Dict, Any, List
 
+from lerobot.common.constants import HF_LEROBOT_HOME
 from lerobot.common.policies.factory import make_policy
-from lerobot.common.envs.utils import preprocess_observation
-from lerobot.common.utils.control_utils import predict_action
 from lerobot.common.policies.pretrained import PreTrainedPolicy
 from lerobot.common.utils.utils import get_safe_torch_device
+from lerobot.configs.types import FeatureType
+from . import serial
 from .config import RemoteInferenceConfig
 
 logger = logging.getLogger(__name__)
 
+# How often the idle serving loop checks whether `stop` was called
+_STOP_POLL_MS = 100
+# Number of dummy inferences run by `start` before accepting requests
+_WARMUP_STEPS = 3
+
+
+def _layout(observation: Dict[str, Any]) -> tuple:
+    """Key, shape and dtype signature; only observations with the same layout can be stacked."""
+    return tuple(
+        (k, v.shape, v.dtype.str) if isinstance(v, np.ndarray) else (k, type(v).__name__)
+        for k, v in sorted(observation.items())
+        if k not in ("task", "robot_type")
+    )
+
+
+def _as_arrays(observation: Dict[str, Any]) -> Dict[str, Any]:
+    """Numpy observation dict. Arrays arrive as ndarrays already, only lists of numbers are converted."""
+    # An explicit dtype makes numpy skip inferring it from every element of the list
+    return {k: np.asarray(v, dtype=np.float32) if isinstance(v, list) else v for k, v in observation.items()}
+
+
+def _canonical(observation: Dict[str, Any]) -> Dict[str, Any]:
+    """Numpy observation under LeRobot keys, the form every inference path starts from.
+
+    Lists of numbers become float32 arrays. Gym-style observations (`agent_pos`, optionally
+    `environment_state` and `pixels`) are renamed like `preprocess_observation` does, but images stay
+    HxWxC uint8 so that `_to_policy_inputs` converts them on the device. `task` and `robot_type` are kept.
+    """
+    observation = _as_arrays(observation)
+    if "agent_pos" not in observation:
+        return observation
+    renamed = {k: v for k, v in observation.items() if k in ("task", "robot_type")}
+    pixels = observation.get("pixels")
+    if isinstance(pixels, dict):
+        renamed.update({f"observation.images.{key}": image for key, image in pixels.items()})
+    elif pixels is not None:
+        renamed["observation.image"] = pixels
+    if "environment_state" in observation:
+        renamed["observation.environment_state"] = observation["environment_state"].astype(np.float32)
+    renamed["observation.state"] = observation["agent_pos"].astype(np.float32)
+    return renamed
+
+
+def _to_policy_inputs(
+    raw: Dict[str, torch.Tensor], memory_format: torch.memory_format = torch.contiguous_format
+) -> Dict[str, Any]:
+    """Batched tensors in policy input format: images become float32 in [0, 1], channel first."""
+    batch: Dict[str, Any] = {}
+    for name, tensor in raw.items():
+        if "image" in name:
+            tensor = (tensor.type(torch.float32) / 255).permute(0, 3, 1, 2)
+            tensor = tensor.contiguous(memory_format=memory_format)
+        batch[name] = tensor
+    return batch
+
+
 class RemoteInferenceServer:
     """Server that runs policy inference on a powerful machine."""
     
     def __init__(self, config: RemoteInferenceConfig):
         self.config = config
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REP)
+        if self.config.transport == "inproc":
+            # inproc endpoints are only reachable from sockets of the same context
+            self.context = zmq.Context.instance()
+        else:
+            # More than one IO thread so several clients' traffic is not serialized on a single core
+            self.context = zmq.Context(io_threads=min(os.cpu_count() or 1, 4))
+        # ROUTER queues requests from any number of clients without enforcing send/recv lockstep
+        self.socket = self.context.socket(zmq.ROUTER)
         # Avoid hanging on close
         self.socket.setsockopt(zmq.LINGER, 0)
+        # Leave room for a full micro-batch from every client without dropping or blocking
+        hwm = max(8, 2 * self.config.max_batch_size)
+        self.socket.setsockopt(zmq.RCVHWM, hwm)
+        self.socket.setsockopt(zmq.SNDHWM, hwm)
+        # Keep idle connections alive through NAT gateways of cloud GPU hosts
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE_IDLE, 30)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE_INTVL, 5)
         
         # Initialize policy using loaded PreTrainedConfig
         self.policy: PreTrainedPolicy = make_policy(self.config.policy_config)
@@ -31,75 +107,350 @@ class RemoteInferenceServer:
             self.policy.reset()
         except Exception:
             pass  # Some policies may not implement reset
+        if self.config.compile_policy:
+            # Keep compiled kernels across server restarts instead of in a temporary directory
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(HF_LEROBOT_HOME / "inductor"))
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+            # Compiling the module would only cover `forward`; inference goes through `select_action`
+            self.policy.select_action = torch.compile(
+                self.policy.select_action,
+                mode=self.config.compile_mode,
+                fullgraph=self.config.compile_fullgraph,
+            )
          
-        self.device = get_safe_torch_device()
+        self.device = get_safe_torch_device(self.config.policy_config.device)
         logger.info(f"Using device: {self.device}")
-        # ZMQ socket options for robustness
-        self.socket.setsockopt(zmq.LINGER, 0)
-        self.socket.setsockopt(zmq.RCVHWM, 1)
-        self.socket.setsockopt(zmq.SNDHWM, 1)
+        # NHWC convolution kernels are faster on tensor-core GPUs for the policies' visual backbones
+        self._memory_format = torch.channels_last if self.config.channels_last else torch.contiguous_format
+        if self.config.channels_last:
+            self.policy.to(memory_format=torch.channels_last)
+        # Input shapes are fixed per deployment, let cuDNN pick the fastest kernels for them
+        torch.backends.cudnn.benchmark = True
+        # Optionally keep the weights in reduced precision to halve their memory traffic
+        self._dtype = None
+        if self.config.policy_dtype is not None and self.device.type == "cuda":
+            self._dtype = getattr(torch, self.config.policy_dtype)
+            self.policy.to(self._dtype)
+            # Normalization statistics stay in float32 to avoid precision issues on inputs and actions
+            for name in ("normalize_inputs", "normalize_targets", "unnormalize_outputs"):
+                module = getattr(self.policy, name, None)
+                if isinstance(module, torch.nn.Module):
+                    module.float()
+            logger.info(f"Policy weights cast to {self._dtype}")
+        # Replies reuse one msgpack packer; the action array itself goes out as a raw frame
+        self._encoder = serial.Encoder()
+        # Used to gather further requests into a batch once the first one has arrived
+        self._poller = zmq.Poller()
+        self._poller.register(self.socket, zmq.POLLIN)
+        self._stop_event = threading.Event()
+        self._ready_event = threading.Event()
+        # Single worker so batches are decoded, and answered, in arrival order
+        self._decoder = None
+        if self.config.decode_in_background:
+            self._decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="remote-decode")
+        # Pinned host and device buffers reused by `_process_observation`, allocated on first use
+        self._obs_buffers: Dict[str, tuple] = {}
+        # Host to device copies of observations are issued on their own stream
+        self._copy_stream = torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        # Settings that are fixed for the deployed policy, resolved here instead of on every request
+        self._autocast_kwargs = None
+        if self._dtype is not None:
+            self._autocast_kwargs = {"device_type": self.device.type, "dtype": self._dtype}
+        elif self.device.type == "cuda" and self.config.policy_config.use_amp:
+            self._autocast_kwargs = {"device_type": self.device.type}
+        self._use_graph = self.config.use_cuda_graphs and self.device.type == "cuda"
+        # CUDA graph state (see `_predict_graphed`), captured on the first request
+        self._graph = None
+        self._graph_key = None
+        self._graph_inputs: Dict[str, torch.Tensor] = {}
+        self._graph_output = None
 
     def start(self):
         """Start the inference server."""
-        self.socket.bind(f"tcp://*:{self.config.server_port}")
+        # Pay compilation and kernel autotuning now rather than on the first client requests
+        self._warmup()
+        if self.config.server_cpu_affinity is not None:
+            if hasattr(os, "sched_setaffinity"):
+                # Threads inherit the mask of the thread that creates them, so pin only once the decode thread
+                # exists. Torch starts its CPU worker threads on the first parallel op: those the warmup ran
+                # keep every core, but without input features to warm up with, they start on the first
+                # request and inherit this single core
+                if self._decoder is not None:
+                    self._decoder.submit(lambda: None).result()
+                # Pid 0 is the calling thread, which runs the serving loop
+                os.sched_setaffinity(0, {self.config.server_cpu_affinity})
+            else:
+                logger.warning("CPU affinity is not supported on this platform, ignoring server_cpu_affinity")
+        if self.config.transport == "inproc":
+            self.socket.bind(self.config.inproc_endpoint)
+        else:
+            self.socket.bind(f"tcp://*:{self.config.server_port}")
+            # Clients on this machine may connect over a unix socket (transport "ipc") instead of TCP
+            if zmq.has("ipc"):
+                self.socket.bind(self.config.ipc_endpoint)
         logger.info(f"Server running on port {self.config.server_port}")
+        self._ready_event.set()
         
         try:
-            while True:
+            # Future of the batch being decoded in the background, run once the next batch has been received
+            pending = None
+            while not self._stop_event.is_set():
                 try:
-                    # Receive observation from client
-                    observation = self.socket.recv_json(flags=0)
+                    # Each request is [identity, request id, header, *buffers]. While a batch is pending, only
+                    # take requests that are already queued so that batch is not held back
+                    requests = self._recv_batch(0 if pending is not None else _STOP_POLL_MS)
                 except zmq.ZMQError as e:
                     logger.error(f"ZMQ receive error: {e}")
                     break
-                
-                try:
-                    # Convert JSON observation to numpy and get optional text prompt
-                    task_prompt = observation.get("task", None)
-                    # Build numpy observation dict (exclude "task")
-                    obs_np = {k: np.array(v) if isinstance(v, list) else v for k, v in observation.items() if k != "task"}
-                    # Use LeRobot control_utils to handle preprocessing and inference for any policy
-                    action_tensor = predict_action(
-                        obs_np,
-                        self.policy,
-                        self.device,
-                        use_amp=self.config.policy_config.use_amp,
-                        task=task_prompt,
-                        robot_type=None,
-                    )
-                    action_np = action_tensor.cpu().numpy()
-                    
-
-                    self.socket.send_json({
-                        "action": action_np.tolist(),
-                        "status": "success"
-                    })
-                
-                except Exception as e:
-                    logger.error(f"Error processing request: {e}")
-                    try:
-                        self.socket.send_json({"status": "error", "error": str(e)})
-                    except zmq.ZMQError:
-                        logger.error("Failed to send error response to client")
+                if self._decoder is None:
+                    if requests:
+                        self._handle_batch(requests)
+                    continue
+                decoded = self._decoder.submit(self._decode_batch, requests) if requests else None
+                if pending is not None:
+                    self._run_batch(*pending.result())
+                pending = decoded
+            if pending is not None:
+                self._run_batch(*pending.result())
         
         except KeyboardInterrupt:
             logger.info("Shutting down server...")
         finally:
+            if self._decoder is not None:
+                self._decoder.shutdown(wait=False)
             self.socket.close()
-            self.context.term()
+            # The process-wide context used for inproc stays alive for the clients sharing it
+            if self.config.transport != "inproc":
+                self.context.term()
+
+    @torch.inference_mode()
+    def _warmup(self) -> None:
+        """Run a few inferences on a zero observation shaped like the policy's input features.
+
+        CUDA graphs are not captured here, they are keyed on the task and robot type of real requests.
+        """
+        input_features = self.config.policy_config.input_features
+        if not input_features:
+            return
+        observation = {}
+        for name, feature in input_features.items():
+            if feature.type is FeatureType.VISUAL:
+                # Clients send HxWxC uint8 frames
+                channels, height, width = feature.shape
+                observation[name] = np.zeros((height, width, channels), dtype=np.uint8)
+            else:
+                observation[name] = np.zeros(feature.shape, dtype=np.float32)
+        try:
+            # torch.compile and cuDNN autotuning typically settle by the third call
+            for _ in range(_WARMUP_STEPS):
+                self._predict_eager([dict(observation)])
+                # Drop actions queued from the dummy observation so every step runs the model
+                self.policy.reset()
+        except Exception as e:
+            logger.warning(f"Policy warmup failed: {e}")
+            self.policy.reset()
+
+    def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """Block until `start` has warmed up the policy and bound the socket; False on timeout."""
+        return self._ready_event.wait(timeout)
+
+    def stop(self) -> None:
+        """Ask the serving loop to exit; `start` returns within `_STOP_POLL_MS` and closes the socket."""
+        self._stop_event.set()
+
+    def _recv_batch(self, timeout_ms: float = _STOP_POLL_MS) -> List[list]:
+        """Wait for one request, then collect more for up to `max_batch_delay_ms` or `max_batch_size`.
+
+        Returns an empty list when nothing arrived within `timeout_ms`, so the loop can check for `stop`.
+        """
+        if not self._poller.poll(timeout_ms):
+            return []
+        requests = [self.socket.recv_multipart(copy=False)]
+        deadline = time.monotonic() + self.config.max_batch_delay_ms / 1000
+        while len(requests) < self.config.max_batch_size:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0 or not self._poller.poll(remaining_ms):
+                break
+            requests.append(self.socket.recv_multipart(copy=False))
+        return requests
+
+    def _handle_batch(self, requests: List[list]) -> None:
+        """Run inference once per group of same-layout observations and reply to every request."""
+        self._run_batch(*self._decode_batch(requests))
+
+    def _decode_batch(self, requests: List[list]) -> tuple[Dict[tuple, list], List[tuple]]:
+        """Decode requests and group them by layout; requests that fail to decode are returned separately.
+
+        Does not use the socket, so it can run on the decode thread.
+        """
+        groups: Dict[tuple, list] = {}
+        failures: List[tuple] = []
+        for request in requests:
+            try:
+                identity, req_id, *frames = request
+                if not frames:
+                    raise ValueError("Request has no observation frames")
+                observation = _canonical(serial.decode(frames))
+            except Exception as e:
+                if len(request) < 2:
+                    # No request id to answer to
+                    logger.warning(f"Dropping malformed request of {len(request)} frames")
+                else:
+                    failures.append((request[0], request[1], e))
+                continue
+            groups.setdefault(_layout(observation), []).append((identity, req_id, observation))
+        return groups, failures
+
+    @torch.inference_mode()
+    def _run_batch(self, groups: Dict[tuple, list], failures: List[tuple]) -> None:
+        for identity, req_id, error in failures:
+            self._send_error(identity, req_id, error)
+        for group in groups.values():
+            try:
+                actions = self._predict([observation for _, _, observation in group])
+                if len(actions) != len(group):
+                    raise ValueError(f"Policy returned {len(actions)} actions for {len(group)} observations")
+            except Exception as e:
+                for identity, req_id, _ in group:
+                    self._send_error(identity, req_id, e)
+                continue
+            for (identity, req_id, _), action_np in zip(group, actions, strict=True):
+                self.socket.send_multipart(
+                    [identity, req_id, *self._encoder.encode({"action": action_np, "status": "success"})],
+                    copy=False,
+                )
+
+    def _predict(self, observations: List[Dict[str, Any]]) -> List[np.ndarray]:
+        """Return one action per observation (see `_canonical`); all share the same keys and shapes."""
+        if len(observations) == 1 and self._use_graph:
+            return [self._predict_graphed(observations[0])]
+        return self._predict_eager(observations)
+
+    def _predict_eager(self, observations: List[Dict[str, Any]]) -> List[np.ndarray]:
+        # The observations are converted once, straight into device tensors, and handed to the policy
+        batch = self._to_batch(observations)
+        with self._autocast():
+            action_tensor = self.policy.select_action(batch).to("cpu", torch.float32)
+        if len(observations) == 1:
+            # Remove the batch dimension
+            return [action_tensor.squeeze(0).numpy()]
+        return list(action_tensor.numpy())
+
+    def _predict_graphed(self, observation: Dict[str, Any]) -> np.ndarray:
+        """Replay a CUDA graph captured on the first request; other layouts or prompts run eagerly."""
+        task = observation.pop("task", None)
+        robot_type = observation.pop("robot_type", None)
+        key = (_layout(observation), task, robot_type)
+        if self._graph is None:
+            try:
+                self._capture_graph(key, observation, task, robot_type)
+            except Exception as e:
+                # Eager mode from now on, so the failure is logged once instead of on every request
+                logger.error(f"CUDA graph capture failed, running the policy eagerly instead: {e}")
+                self._use_graph = False
+                self.policy.reset()
+        if key != self._graph_key:
+            return self._predict_eager([{**observation, "task": task, "robot_type": robot_type}])[0]
+        for name, static in self._graph_inputs.items():
+            static.copy_(torch.from_numpy(observation[name]).unsqueeze(0))
+        self._graph.replay()
+        return self._graph_output[0].to("cpu", torch.float32).numpy()
+
+    def _capture_graph(
+        self, key: tuple, obs_np: Dict[str, np.ndarray], task: str | None, robot_type: str | None
+    ) -> None:
+        # Inputs live at fixed device addresses; the conversion to policy format is part of the graph
+        inputs = {
+            name: torch.from_numpy(array).unsqueeze(0).to(self.device) for name, array in obs_np.items()
+        }
+
+        def run() -> torch.Tensor:
+            batch = _to_policy_inputs(inputs, self._memory_format)
+            batch["task"] = task or ""
+            batch["robot_type"] = robot_type or ""
+            return self.policy.select_action(batch)
+
+        with torch.inference_mode(), self._autocast():
+            # Warm up on a side stream before capture, as required by torch.cuda.graph
+            side_stream = torch.cuda.Stream(self.device)
+            side_stream.wait_stream(torch.cuda.current_stream(self.device))
+            with torch.cuda.stream(side_stream):
+                for _ in range(3):
+                    run()
+            torch.cuda.current_stream(self.device).wait_stream(side_stream)
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                output = run()
+        self.policy.reset()
+        # Only kept once capture succeeded, so a failed capture never leaves a half-built graph behind
+        self._graph, self._graph_key, self._graph_inputs, self._graph_output = graph, key, inputs, output
+        logger.info(f"Captured CUDA graph for observation layout {key[0]}")
+
+    def _autocast(self):
+        if self._autocast_kwargs is None:
+            return nullcontext()
+        return torch.autocast(**self._autocast_kwargs)
+
+    def _copy_to_device(self, tensors: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Move every tensor with `_to_device`, issuing the copies on a side stream off the compute stream.
+
+        The compute stream waits for the copies, so the returned tensors can be used right away.
+        """
+        if self._copy_stream is None:
+            return {name: self._to_device(name, tensor) for name, tensor in tensors.items()}
+        with torch.cuda.stream(self._copy_stream):
+            on_device = {name: self._to_device(name, tensor) for name, tensor in tensors.items()}
+        torch.cuda.current_stream(self.device).wait_stream(self._copy_stream)
+        return on_device
+
+    def _to_device(self, name: str, tensor: torch.Tensor) -> torch.Tensor:
+        """Copy `tensor` into the persistent device buffer for `name` through a pinned staging buffer.
+
+        The returned tensor is overwritten by the next observation, so it must be consumed before then.
+        """
+        if self.device.type != "cuda":
+            return tensor.to(self.device)
+        pinned, buffer = self._obs_buffers.get(name, (None, None))
+        stale = buffer is None or buffer.shape != tensor.shape or buffer.dtype != tensor.dtype
+        if stale or buffer.stride() != tensor.stride():
+            # Same strides as the source, so channels-last inputs stay channels-last on the device
+            pinned = torch.empty_like(tensor, pin_memory=True)
+            buffer = torch.empty_like(tensor, device=self.device)
+            self._obs_buffers[name] = (pinned, buffer)
+        pinned.copy_(tensor)
+        buffer.copy_(pinned, non_blocking=True)
+        return buffer
+
+    def _send_error(self, identity: zmq.Frame, req_id: zmq.Frame, error: Exception) -> None:
+        logger.error(f"Error processing request: {error}")
+        try:
+            reply = self._encoder.encode({"status": "error", "error": str(error)})
+            self.socket.send_multipart([identity, req_id, *reply])
+        except zmq.ZMQError:
+            logger.error("Failed to send error response to client")
             
-    def _process_observation(self, observation: Dict[str, Any]) -> Dict[str, torch.Tensor]:
-        """Process raw observation into model input format."""
-        # Extract optional text prompt without conversion
-        task_prompt = observation.pop("task", None)
-        # Convert lists back to numpy arrays for numeric features
-        obs_np = {k: np.array(v) if isinstance(v, list) else v for k, v in observation.items()}
-        # Preprocess numeric observation to torch tensors (channel-first, normalized)
-        obs_tensor = preprocess_observation(obs_np)
-        # Move tensors to the inference device
-        for name, tensor in obs_tensor.items():
-            obs_tensor[name] = tensor.to(self.device, non_blocking=True)
-        # Reattach text prompt for language-conditioned policies
-        if task_prompt is not None:
-            obs_tensor["task"] = task_prompt
-        return obs_tensor
+    def _process_observation(self, observation: Dict[str, Any]) -> Dict[str, Any]:
+        """Process raw observation into a batch of one for `select_action`, resident on the device.
+
+        The tensors live in the buffers of `_to_device`, so they must be consumed before the next call.
+        """
+        return self._to_batch([_canonical(observation)])
+
+    def _to_batch(self, observations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Stack observations (see `_canonical`) along a new batch dimension into device-resident inputs."""
+        # Extract text fields without conversion
+        tasks = [observation.pop("task", None) or "" for observation in observations]
+        robot_types = [observation.pop("robot_type", None) or "" for observation in observations]
+        if len(observations) == 1:
+            raw = {name: torch.from_numpy(array).unsqueeze(0) for name, array in observations[0].items()}
+        else:
+            raw = {
+                name: torch.from_numpy(np.stack([observation[name] for observation in observations]))
+                for name in observations[0]
+            }
+        # Images are copied as uint8 and only converted to float on the device
+        batch = _to_policy_inputs(self._copy_to_device(raw), self._memory_format)
+        # Reattach text fields for language-conditioned policies
+        batch["task"] = tasks[0] if len(observations) == 1 else tasks
+        batch["robot_type"] = robot_types[0] if len(observations) == 1 else robot_types
+        return batch
@@ -5,6 +5,7 @@ Usage:
   python lerobot/scripts/remote_client.py \
     --server_host <host> --server_port <port> \
     --policy_path <path_or_hub_id> \
+    [--compress_images] [--wire_dtype float16|bfloat16] [--transport tcp|ipc] \
     --robot.type <robot_type> --id <robot_id> --port <device_port> [additional robot args]
 Example:
   python lerobot/scripts/remote_client.py \
@@ -18,10 +19,9 @@ import time
 import draccus
 from lerobot.remote.client import RemoteInferenceClient
 from lerobot.remote.config import RemoteInferenceConfig
-from lerobot.configs.policies import PreTrainedConfig
 from lerobot.common.robots.config import RobotConfig
 from lerobot.common.robots.utils import make_robot_from_config
-from lerobot.common.utils.robot_utils import busy_wait
+from lerobot.common.utils.robot_utils import hybrid_wait
 
 
 def main():
@@ -42,6 +42,25 @@ def main():
         "--timeout_ms", type=int, default=1000,
         help="Timeout for server requests in milliseconds"
     )
+    parser.add_argument(
+        "--compress_images", action="store_true",
+        help="JPEG-encode camera frames before sending them to the server"
+    )
+    parser.add_argument(
+        "--wire_dtype", type=str, default=None, choices=["float16", "bfloat16"],
+        help="Send float observations in this 16-bit dtype to halve their size (default: float32)"
+    )
+    parser.add_argument(
+        "--transport", type=str, default="tcp", choices=["tcp", "ipc"],
+        help="Use ipc (unix socket) only when the server runs on this machine (default: tcp)"
+    )
+    parser.add_argument(
+        "--prefer_local_policy", action="store_true",
+        help=(
+            "Read the policy config from the local Hugging Face cache when it is there instead of querying "
+            "the Hub"
+        ),
+    )
     # Parse known args; remaining args will be passed to draccus to parse robot config
     args, unknown = parser.parse_known_args()
 
@@ -56,17 +75,18 @@ def main():
     )
     robot = make_robot_from_config(robot_config)
 
-    # Load policy configuration
-    policy_config = PreTrainedConfig.from_pretrained(args.policy_path)
-
     # Build remote inference config
     remote_config = RemoteInferenceConfig(
         server_host=args.server_host,
         server_port=args.server_port,
         timeout_ms=args.timeout_ms,
         policy_path=args.policy_path,
-        policy_config=policy_config,
-        robot_config=robot_config
+        prefer_local_policy=args.prefer_local_policy,
+        transport=args.transport,
+        robot_config=robot_config,
+        action_feature_names=list(robot.action_features),
+        compress_images=args.compress_images,
+        wire_dtype=args.wire_dtype,
     )
     client: RemoteInferenceClient = RemoteInferenceClient(remote_config)
 
@@ -76,16 +96,19 @@ def main():
 
     try:
         logging.info("Starting control loop...")
+        # Inference runs in the client's background thread, so camera reads overlap the network round trip
+        client.start_background()
         while True:
             loop_start = time.perf_counter()
-            # Get observation and infer action
+            # Publish the newest observation and apply the newest action available
             obs = robot.get_observation()
-            action = client(obs)
-            # Send action to robot
-            robot.send_action(action)
+            client.push_observation(obs)
+            action = client.latest_action()
+            if action is not None:
+                robot.send_action(action)
             # Maintain a 30 Hz control loop
             dt = time.perf_counter() - loop_start
-            busy_wait(max(0, 1/30 - dt))
+            hybrid_wait(max(0, 1/30 - dt))
     except KeyboardInterrupt:
         logging.info("Client interrupted, shutting down...")
     finally:
@@ -4,15 +4,30 @@ Script to start the remote inference server for LeRobot policies.
 Usage:
   python lerobot/scripts/remote_server.py \
     --policy_path <path_or_hub_id> \
-    [--host <host>] [--port <port>] [--timeout_ms <ms>]
+    [--host <host>] [--port <port>] [--timeout_ms <ms>] [--compile] [--compile_fullgraph] \
+    [--cuda_graphs] [--policy_dtype bfloat16|float16] [--channels_last] [--decode_thread] \
+    [--cpu_affinity <core>] [--prefer_local_policy] [--max_batch_size <n>] [--max_batch_delay_ms <ms>]
 """
 import logging
 import argparse
+import queue
+import signal
+from logging.handlers import QueueHandler, QueueListener
 
 from lerobot.remote.server import RemoteInferenceServer
 from lerobot.remote.config import RemoteInferenceConfig
 
 
+def _log_in_background() -> QueueListener:
+    """Route root logging through a queue so the serving loop never waits on the handlers' I/O."""
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run LeRobot remote inference server.")
     parser.add_argument(
@@ -31,18 +46,78 @@ def main():
         "--timeout_ms", type=int, default=1000,
         help="Server request timeout in milliseconds"
     )
+    parser.add_argument(
+        "--compile", action="store_true",
+        help="Compile the policy with torch.compile and warm it up before serving"
+    )
+    parser.add_argument(
+        "--compile_fullgraph", action="store_true",
+        help="With --compile, require the policy to compile without graph breaks"
+    )
+    parser.add_argument(
+        "--cuda_graphs", action="store_true",
+        help="Capture inference as a CUDA graph (stateless, fixed-shape policies only)"
+    )
+    parser.add_argument(
+        "--policy_dtype", type=str, default=None, choices=["bfloat16", "float16"],
+        help="Cast the policy weights to this dtype on CUDA devices (default: keep float32)"
+    )
+    parser.add_argument(
+        "--channels_last", action="store_true",
+        help="Use channels-last memory format for convolutional visual backbones"
+    )
+    parser.add_argument(
+        "--decode_thread", action="store_true",
+        help="Decode incoming requests on a background thread while the policy runs"
+    )
+    parser.add_argument(
+        "--cpu_affinity", type=int, default=None,
+        help="Pin the serving thread to this CPU core (Linux only)"
+    )
+    parser.add_argument(
+        "--prefer_local_policy", action="store_true",
+        help=(
+            "Read the policy config from the local Hugging Face cache when it is there instead of querying "
+            "the Hub"
+        ),
+    )
+    parser.add_argument(
+        "--max_batch_size", type=int, default=1,
+        help="Run up to this many same-layout requests as one policy call (stateless policies only)"
+    )
+    parser.add_argument(
+        "--max_batch_delay_ms", type=float, default=2.0,
+        help="How long to wait for more requests to batch after the first one arrives"
+    )
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
+    listener = _log_in_background()
     config = RemoteInferenceConfig(
         server_host=args.host,
         server_port=args.port,
         timeout_ms=args.timeout_ms,
         policy_path=args.policy_path,
+        compile_policy=args.compile,
+        compile_fullgraph=args.compile_fullgraph,
+        use_cuda_graphs=args.cuda_graphs,
+        policy_dtype=args.policy_dtype,
+        channels_last=args.channels_last,
+        decode_in_background=args.decode_thread,
+        server_cpu_affinity=args.cpu_affinity,
+        prefer_local_policy=args.prefer_local_policy,
+        max_batch_size=args.max_batch_size,
+        max_batch_delay_ms=args.max_batch_delay_ms,
         robot_config=None  # not needed for server
     )
     server = RemoteInferenceServer(config)
-    server.start()
+    # Let `kill`/container shutdown stop the server as cleanly as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    try:
+        server.start()
+    finally:
+        # Flush records still queued when the server exits
+        listener.stop()
 
 
 if __name__ == "__main__":
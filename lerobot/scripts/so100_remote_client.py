@@ -78,6 +78,9 @@ def main():
         policy_path=POLICY_PATH,
         policy_config=None,  # Let server handle policy configuration
         robot_config=robot_config,
+        action_feature_names=list(robot.action_features),
+        # 1080p and 720p RGB frames are far too large to send raw at 30 Hz
+        compress_images=True,
     )
     client = RemoteInferenceClient(remote_config)
 
@@ -89,15 +92,17 @@ def main():
 
     try:
         logging.info("Starting control loop...")
+        # Inference runs in the client's background thread, so camera reads overlap the network round trip
+        client.start_background()
         while True:
-            # Get robot observation (includes all camera frames)
+            # Get robot observation (includes all camera frames) and hand it to the inference thread
             obs = robot.get_observation()
+            client.push_observation(obs)
 
-            # Get action from server
-            action = client(obs)
-
-            # Send action to robot
-            robot.send_action(action)
+            # Send the most recent action to robot (none until the first reply arrives)
+            action = client.latest_action()
+            if action is not None:
+                robot.send_action(action)
 
     except KeyboardInterrupt:
         logging.info("Client interrupted, shutting down...")
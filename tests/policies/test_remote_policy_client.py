@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+# Copyright 2025 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import msgpack
+import numpy as np
+import pytest
+import torch
+
+from lerobot.common.policies.remote_policy_client import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    RemotePolicyClient,
+    RemotePolicyConfig,
+)
+
+
+class _PolicyHandler(BaseHTTPRequestHandler):
+    """Answers /predict with twice `observation.state`, one row per requested action."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(self.server.health_status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        use_msgpack = self.headers["Content-Type"] == MSGPACK_CONTENT_TYPE
+        payload = msgpack.unpackb(body) if use_msgpack else json.loads(body)
+        self.server.payloads.append(payload)
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        state = payload["inputs"]["observation.state"]
+        if use_msgpack:
+            state = np.frombuffer(state["data"], dtype=state["dtype"]).reshape(state["shape"])
+        state = np.asarray(state, dtype=np.float32)
+        num_actions = self.server.num_actions or payload.get("action_horizon", 1)
+        if num_actions > 1:
+            action = np.stack([state[0] * 2 + step for step in range(num_actions)])
+        else:
+            action = state * 2
+
+        if use_msgpack:
+            packed = {"dtype": "float32", "shape": list(action.shape), "data": action.tobytes()}
+            reply, content_type = msgpack.packb({"action": packed}), MSGPACK_CONTENT_TYPE
+        else:
+            reply, content_type = json.dumps({"action": action.tolist()}).encode(), JSON_CONTENT_TYPE
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+
+@pytest.fixture
+def policy_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PolicyHandler)
+    server.status = 200
+    server.health_status = 200
+    server.num_actions = None
+    server.payloads = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=1)
+
+
+def _client(server, **kwargs) -> RemotePolicyClient:
+    host, port = server.server_address
+    return RemotePolicyClient(
+        RemotePolicyConfig(endpoint=f"http://{host}:{port}", model_name="echo", timeout=2.0, **kwargs)
+    )
+
+
+def test_json_round_trip(policy_server):
+    with _client(policy_server) as client:
+        action = client.select_action({"observation.state": torch.tensor([[1.0, 2.0]])})
+    assert action.dtype == torch.float32
+    assert action.tolist() == [[2.0, 4.0]]
+    assert policy_server.payloads[0]["model"] == "echo"
+
+
+def test_msgpack_round_trip(policy_server):
+    observations = {
+        "observation.state": torch.tensor([[1.0, 2.0]]),
+        # numpy has no bfloat16, the client sends it as float32
+        "observation.image": torch.ones(1, 3, 2, 2, dtype=torch.bfloat16),
+    }
+    with _client(policy_server, content_type=MSGPACK_CONTENT_TYPE) as client:
+        action = client.select_action(observations)
+    assert action.dtype == torch.float32
+    assert action.tolist() == [[2.0, 4.0]]
+    image = policy_server.payloads[0]["inputs"]["observation.image"]
+    assert image["dtype"] == "float32"
+    assert image["shape"] == [1, 3, 2, 2]
+
+
+# Non-CPU devices besides CUDA, which has its own copy path
+_ACCELERATORS = [
+    device
+    for device, backend in (("mps", torch.backends.mps), ("xpu", getattr(torch, "xpu", None)))
+    if backend is not None and backend.is_available()
+]
+
+
+@pytest.mark.skipif(not _ACCELERATORS, reason="needs an mps or xpu device")
+def test_accelerator_observations_are_sent(policy_server):
+    with _client(policy_server, content_type=MSGPACK_CONTENT_TYPE) as client:
+        for device in _ACCELERATORS:
+            observations = {"observation.state": torch.tensor([[1.0, 2.0]], device=device)}
+            assert client.select_action(observations).tolist() == [[2.0, 4.0]]
+
+
+def test_retry_exhaustion_raises(policy_server):
+    policy_server.status = 503
+    with _client(policy_server, max_retries=2, backoff_factor=0.0) as client:
+        with pytest.raises(RuntimeError, match="after 2 attempts"):
+            client.select_action({"observation.state": torch.zeros(1, 2)})
+    assert len(policy_server.payloads) == 2
+
+
+def test_health_check(policy_server):
+    with _client(policy_server) as client:
+        assert client.health_check()
+        policy_server.health_status = 503
+        assert not client.health_check()
+
+
+def test_action_horizon_replay_and_reset(policy_server):
+    observations = {"observation.state": torch.tensor([[1.0, 2.0]])}
+    with _client(policy_server, action_horizon=3) as client:
+        actions = [client.select_action(observations).tolist() for _ in range(3)]
+        assert actions == [[2.0, 4.0], [3.0, 5.0], [4.0, 6.0]]
+        assert len(policy_server.payloads) == 1
+        assert policy_server.payloads[0]["action_horizon"] == 3
+
+        # Queued actions are dropped, so the next call queries the server again
+        client.select_action(observations)
+        client.reset()
+        assert client.select_action(observations).tolist() == [2.0, 4.0]
+        assert len(policy_server.payloads) == 3
+
+
+def test_action_horizon_rejects_short_reply(policy_server):
+    policy_server.num_actions = 2
+    with _client(policy_server, action_horizon=3) as client:
+        with pytest.raises(RuntimeError, match="action_horizon"):
+            client.select_action({"observation.state": torch.tensor([[1.0, 2.0]])})
@@ -1,3 +1,5 @@
+import contextlib
+import os
 import threading
 import time
 import zmq
@@ -18,68 +20,100 @@ class EchoPolicy:
     def reset(self):
         pass
     def select_action(self, batch):
-        # return zeros of same dimension as observation state
-        # assume batch["observation.state"] exists
-        state = batch.get("observation.state")
-        if isinstance(state, torch.Tensor):
-            length = state.shape[-1]
-        else:
-            length = len(state)
-        # return a tensor of increasing ints
-        return torch.arange(length)
+        # One row of increasing ints per observation, as long as its state vector
+        state = batch["observation.state"]
+        return torch.arange(state.shape[-1], device=state.device).expand(state.shape[0], -1)
+
+def _config(**overrides) -> RemoteInferenceConfig:
+    """Config for the dummy policy; the `server_thread` server listens on port 5560."""
+    kwargs = {
+        "server_host": "127.0.0.1",
+        "server_port": 5560,
+        "timeout_ms": 500,
+        "policy_path": "dummy",
+        "policy_config": None,
+        "robot_config": None,
+    }
+    kwargs.update(overrides)
+    return RemoteInferenceConfig(**kwargs)
 
 # Patch make_policy to return our EchoPolicy
 @pytest.fixture(autouse=True)
 def patch_make_policy(monkeypatch):
-    import lerobot.common.policies.factory as factory
-    monkeypatch.setattr(factory, "make_policy", lambda cfg: EchoPolicy())
-
-@pytest.fixture
-def server_thread():
-    # Setup a server in background thread
-    config = RemoteInferenceConfig(
-        server_host="127.0.0.1",
-        server_port=5560,
-        timeout_ms=1000,
-        policy_path="dummy",
-        policy_config=None,
-        robot_config=None,
+    import lerobot.remote.server as server
+    from lerobot.configs.policies import PreTrainedConfig
+    monkeypatch.setattr(server, "make_policy", lambda cfg: EchoPolicy())
+    # Avoid resolving the dummy policy path on the Hub
+    dummy_cfg = type(
+        "PC", (), {"use_amp": False, "device": "cpu", "input_features": {}, "output_features": {}}
     )
+    monkeypatch.setattr(PreTrainedConfig, "from_pretrained", lambda path: dummy_cfg())
+
+@contextlib.contextmanager
+def _serving(config: RemoteInferenceConfig):
+    """Run a server for `config` in a background thread until the block exits."""
     server = RemoteInferenceServer(config)
     t = threading.Thread(target=server.start, daemon=True)
     t.start()
-    # allow server to bind
-    time.sleep(0.1)
-    yield config
-    # No graceful shutdown for simplicity
+    assert server.wait_until_ready(timeout=2.0)
+    try:
+        yield server
+    finally:
+        server.stop()
+        t.join(timeout=1)
+
+@pytest.fixture
+def server_thread():
+    config = _config(transport="inproc")
+    with _serving(config):
+        yield config
 
 def test_client_server_integration(server_thread):
-    # Create client
-    config = RemoteInferenceConfig(
-        server_host="127.0.0.1",
-        server_port=5560,
-        timeout_ms=500,
-        policy_path="dummy",
-        policy_config=None,
-        robot_config=None,
-    )
-    client = RemoteInferenceClient(config)
+    client = RemoteInferenceClient(server_thread)
 
     # Send a dummy observation with agent_pos
     obs = {"agent_pos": np.array([1.0, 2.0, 3.0])}
     action = client(obs)
-    # EchoPolicy returns tensor arange of length 3
+    # EchoPolicy returns arange of length 3; the server strips the batch dimension
     assert isinstance(action, np.ndarray)
     assert action.tolist() == [0, 1, 2]
+    # Actions travel as raw 4-byte floats whatever dtype the policy produced (int64 here)
+    assert action.dtype == np.float32
+
+def test_client_server_over_tcp():
+    config = _config(server_port=5565)
+    with _serving(config):
+        client = RemoteInferenceClient(config)
+        assert client.endpoint == "tcp://127.0.0.1:5565"
+        assert client({"agent_pos": np.array([1.0, 2.0])}).tolist() == [0, 1]
+        client.close()
+
+def test_server_decodes_in_background():
+    config = _config(server_port=5561, decode_in_background=True)
+    with _serving(config):
+        client = RemoteInferenceClient(config)
+        # Each reply matches its own observation when requests are decoded on the background thread
+        for length in (2, 3, 4):
+            assert client({"agent_pos": np.ones(length)}).tolist() == list(range(length))
+        client.close()
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity") or len(os.sched_getaffinity(0)) < 2, reason="needs two usable cores"
+)
+def test_server_cpu_affinity_pins_only_the_serving_thread():
+    all_cores = os.sched_getaffinity(0)
+    core = min(all_cores)
+    config = _config(transport="inproc", decode_in_background=True, server_cpu_affinity=core)
+    with _serving(config) as server:
+        # The decode thread was started before pinning, so it still runs on every core
+        assert server._decoder.submit(os.sched_getaffinity, 0).result() == all_cores
+        masks = [os.sched_getaffinity(thread.native_id) for thread in threading.enumerate()]
+        assert masks.count({core}) == 1
+    assert os.sched_getaffinity(0) == all_cores
 
 def test_process_observation_and_task_attachment():
-    from lerobot.remote.server import RemoteInferenceServer
-    # Use dummy config
-    class Cfg:
-        server_port = 0
-        policy_config = type("PC", (), {"use_amp": False})
     # Create server instance without start
-    server = RemoteInferenceServer(Cfg)
+    server = RemoteInferenceServer(_config())
     # Prepare input with agent_pos and task
     obs_json = {"agent_pos": [0.1, 0.2], "task": "do something"}
     processed = server._process_observation(obs_json.copy())
@@ -90,20 +124,327 @@ def test_process_observation_and_task_attachment():
 
 def test_client_timeout_fallback(monkeypatch):
     # Create client with socket that always times out
-    config = RemoteInferenceConfig(
-        server_host="none",
-        server_port=0,
-        timeout_ms=1,
-        policy_path="dummy",
-        policy_config=None,
-        robot_config=None,
-    )
+    config = _config(server_host="none", server_port=0, timeout_ms=1)
     client = RemoteInferenceClient(config)
-    # Monkeypatch socket.recv_json to raise zmq.Again
-    monkeypatch.setattr(client.socket, "recv_json", lambda: (_ for _ in ()).throw(zmq.error.Again()))
+    # Monkeypatch the reply poller so no reply ever arrives
+    monkeypatch.setattr(client._poller, "poll", lambda timeout=None: [])
     # Also monkeypatch config.policy_config.output_features
     from lerobot.configs.types import PolicyFeature, FeatureType
     client.config.policy_config = type("PC", (), {"output_features": {"act": PolicyFeature(type=FeatureType.ACTION, shape=(2,))}})()
     result = client({})
     assert isinstance(result, np.ndarray)
     assert result.shape == (2,)
+    # Same dtype as the actions decoded from server replies
+    assert result.dtype == np.float32
+    # The zero action is built once and shared by later fallbacks
+    assert client({}) is result
+
+def test_serial_roundtrip_keeps_dtype_and_shape():
+    from lerobot.remote import serial
+    obs = {
+        "pixels": np.arange(2 * 4 * 3, dtype=np.uint8).reshape(2, 4, 3),
+        "agent_pos": np.array([0.5, 1.5], dtype=np.float32),
+        "scalar": np.array(3.0),
+        "task": "pick",
+    }
+    frames = serial.encode(obs)
+    # header followed by one raw buffer per array
+    assert len(frames) == 4
+    decoded = serial.decode([bytes(f) for f in frames])
+    for key in ("pixels", "agent_pos", "scalar"):
+        assert decoded[key].dtype == obs[key].dtype
+        assert decoded[key].shape == obs[key].shape
+        np.testing.assert_array_equal(decoded[key], obs[key])
+    assert decoded["task"] == "pick"
+
+def test_serial_half_float_roundtrip():
+    from lerobot.remote import serial
+    state = np.array([[0.5, -1.25], [3.0, 100.0]], dtype=np.float32)
+    frame = np.full((2, 2, 3), 7, dtype=np.uint8)
+    for half_float in ("float16", "bfloat16"):
+        frames = serial.Encoder(single_float=True, half_float=half_float).encode({"s": state, "f": frame})
+        # Float data takes 2 bytes per value on the wire, images keep their own dtype
+        assert frames[1].nbytes == state.size * 2
+        decoded = serial.decode([bytes(f) for f in frames])
+        assert decoded["s"].dtype == np.float32
+        np.testing.assert_array_equal(decoded["s"], state)
+        np.testing.assert_array_equal(decoded["f"], frame)
+
+def test_serial_float16_keeps_values_out_of_its_range():
+    from lerobot.remote import serial
+    # Would overflow to infinity as float16
+    depth = np.array([1.5, 70000.0], dtype=np.float32)
+    frames = serial.Encoder(single_float=True, half_float="float16").encode({"depth": depth})
+    assert frames[1].nbytes == depth.nbytes
+    np.testing.assert_array_equal(serial.decode([bytes(f) for f in frames])["depth"], depth)
+
+def test_client_stages_camera_frames_in_one_buffer():
+    from lerobot.remote import serial
+    config = _config(server_port=5561)
+    client = RemoteInferenceClient(config)
+    obs = {
+        "front": np.full((4, 6, 3), 7, dtype=np.uint8),
+        "wrist": np.full((2, 3, 3), 9, dtype=np.uint8),
+        "shoulder_pan.pos": 0.5,
+    }
+    staged = dict(obs)
+    client._stage_images(staged)
+    frames = serial.encode(staged)
+    # header + single staging buffer holding both frames
+    assert len(frames) == 2
+    decoded = serial.decode([bytes(f) for f in frames])
+    np.testing.assert_array_equal(decoded["front"], obs["front"])
+    np.testing.assert_array_equal(decoded["wrist"], obs["wrist"])
+    assert decoded["shoulder_pan.pos"] == 0.5
+    client.close()
+
+def test_serial_single_float_narrows_only_floats():
+    from lerobot.remote import serial
+    obs = {
+        "pixels": np.zeros((2, 2, 3), dtype=np.uint8),
+        "agent_pos": np.array([0.25, 0.5]),
+        "gripper.pos": 0.5,
+    }
+    decoded = serial.decode([bytes(f) for f in serial.encode(obs, single_float=True)])
+    assert decoded["pixels"].dtype == np.uint8
+    assert decoded["agent_pos"].dtype == np.float32
+    assert decoded["gripper.pos"] == 0.5
+
+def test_client_background_exchange(server_thread):
+    client = RemoteInferenceClient(server_thread)
+    assert client.latest_action() is None
+    client.start_background()
+    client.push_observation({"agent_pos": np.array([1.0, 2.0])})
+    deadline = time.perf_counter() + 2.0
+    while client.latest_action() is None and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    client.close()
+    assert client.latest_action().tolist() == [0, 1]
+
+def test_client_background_keeps_last_action_when_server_stalls():
+    config = _config(transport="inproc", timeout_ms=100)
+    release = threading.Event()
+    with _serving(config) as server:
+        echo_action = server.policy.select_action
+        calls = []
+
+        def stall_after_first(batch):
+            calls.append(batch)
+            if len(calls) > 1:
+                release.wait(timeout=3.0)
+            return echo_action(batch)
+
+        server.policy.select_action = stall_after_first
+        client = RemoteInferenceClient(config)
+        client.start_background()
+        client.push_observation({"agent_pos": np.array([1.0, 2.0])})
+        deadline = time.perf_counter() + 2.0
+        while client.latest_action() is None and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        first = client.latest_action()
+        assert first.tolist() == [0, 1]
+        client.push_observation({"agent_pos": np.array([1.0, 2.0])})
+        # Past the client timeout and the retries of `__call__`, with the server stuck on the second request
+        time.sleep(1.3)
+        assert len(calls) == 2
+        assert client.latest_action() is first
+        release.set()
+        client.close()
+
+def test_client_image_staging_wait_times_out(server_thread):
+    class PendingTracker:
+        """Tracker of a frame that zmq never releases, as with a hung server."""
+        def wait(self, timeout=None):
+            assert timeout is not None
+            raise zmq.error.NotDone()
+
+    client = RemoteInferenceClient(server_thread)
+    observation = {"agent_pos": np.ones(2), "observation.images.cam": np.zeros((4, 4, 3), dtype=np.uint8)}
+    client.submit(observation)
+    client._img_tracker = PendingTracker()
+    with pytest.raises(zmq.error.Again):
+        client.submit(observation)
+    client.close()
+
+def test_client_reuses_prepared_obs_buffer(server_thread):
+    client = RemoteInferenceClient(server_thread)
+    buffers = client.prepare_obs_buffer({"agent_pos": ((3,), np.float32)})
+    state = buffers["agent_pos"]
+    # The same array is refilled in place every tick
+    for step in range(2):
+        state[:] = step
+        assert client(buffers).tolist() == [0, 1, 2]
+    client.close()
+
+def test_push_observation_copies_reused_buffers(server_thread):
+    client = RemoteInferenceClient(server_thread)
+    buffers = RemoteInferenceClient.prepare_obs_buffer({"agent_pos": ((3,), np.float32)})
+    buffers["agent_pos"][:] = 1.0
+    client.push_observation(buffers)
+    # Refilling right away does not change the observation waiting to be sent
+    buffers["agent_pos"][:] = 2.0
+    assert client._obs_slot[0]["agent_pos"].tolist() == [1.0, 1.0, 1.0]
+    client.close()
+
+def test_clip_action_bounds_each_dimension():
+    from lerobot.remote import _ops
+    action = np.array([[-2.0, 0.5, 3.0], [0.0, 4.0, -3.0]], dtype=np.float32)
+    low = np.array([-1.0, -1.0, -1.0], dtype=np.float32)
+    high = np.array([1.0, 1.0, 2.0], dtype=np.float32)
+    clipped = _ops.clip_action(action, low, high)
+    assert clipped.dtype == np.float32
+    assert clipped.tolist() == [[-1.0, 0.5, 2.0], [0.0, 1.0, -1.0]]
+
+def test_client_checks_action_bounds():
+    with pytest.raises(ValueError, match="same length"):
+        _config(action_low=[-1.0, -1.0], action_high=[1.0])
+    client = RemoteInferenceClient(_config(action_low=[-1.0, -1.0], action_high=[1.0, 2.0]))
+    chunk = np.array([[-3.0, 3.0], [0.5, -0.5]], dtype=np.float32)
+    assert client._clip_action(chunk).tolist() == [[-1.0, 2.0], [0.5, -0.5]]
+    with pytest.raises(ValueError, match="does not match"):
+        client._clip_action(np.zeros(3, dtype=np.float32))
+    client.close()
+
+def test_client_uses_tcp_for_local_host_by_default():
+    # A localhost port may be forwarded to another machine (ssh -L, docker -p), so ipc is opt-in
+    for host in ("localhost", "127.0.0.1"):
+        client = RemoteInferenceClient(_config(server_host=host, server_port=5562))
+        assert client.endpoint == f"tcp://{host}:5562"
+        client.close()
+
+@pytest.mark.skipif(not zmq.has("ipc"), reason="zmq built without ipc support")
+def test_client_uses_ipc_when_requested():
+    config = _config(server_host="localhost", server_port=5562, transport="ipc")
+    assert config.ipc_endpoint.startswith("ipc://")
+    assert config.ipc_endpoint.endswith("lerobot-5562.sock")
+    client = RemoteInferenceClient(config)
+    assert client.endpoint == config.ipc_endpoint
+    client.close()
+
+def test_serial_jpeg_roundtrip():
+    from lerobot.remote import serial
+    image = np.zeros((32, 48, 3), dtype=np.uint8)
+    image[..., 0] = 200
+    image[..., 2] = np.linspace(0, 255, 48, dtype=np.uint8)
+    frames = serial.encode({"front": serial.encode_jpeg(image, quality=95)})
+    assert len(frames[1]) < image.nbytes
+    decoded = serial.decode([bytes(f) for f in frames])["front"]
+    assert decoded.dtype == np.uint8
+    assert decoded.shape == image.shape
+    assert np.abs(decoded.astype(np.int16) - image).max() < 16
+
+def test_serial_encoder_is_reusable():
+    from lerobot.remote import serial
+    encoder = serial.Encoder(single_float=True)
+    first = encoder.encode({"a": np.array([1.0, 2.0])})
+    second = encoder.encode({"b": np.array([3, 4], dtype=np.int32), "c": np.zeros(2)})
+    assert len(first) == 2 and len(second) == 3
+    np.testing.assert_array_equal(serial.decode([bytes(f) for f in first])["a"], [1.0, 2.0])
+    decoded = serial.decode([bytes(f) for f in second])
+    assert decoded["b"].dtype == np.int32
+    assert decoded["c"].dtype == np.float32
+
+def test_client_reuses_camera_layout_across_calls():
+    from lerobot.remote import serial
+    config = _config(server_port=5563)
+    client = RemoteInferenceClient(config)
+    first = {"front": np.full((2, 2, 3), 1, dtype=np.uint8)}
+    client._stage_images(first)
+    slots = client._img_slots
+    second = {"front": np.full((2, 2, 3), 5, dtype=np.uint8)}
+    client._stage_images(second)
+    assert client._img_slots is slots
+    decoded = serial.decode([bytes(f) for f in serial.encode(second)])
+    np.testing.assert_array_equal(decoded["front"], np.full((2, 2, 3), 5, dtype=np.uint8))
+    # A new resolution rebuilds the layout
+    client._stage_images({"front": np.zeros((4, 4, 3), dtype=np.uint8)})
+    assert client._img_slots is not slots
+    client.close()
+
+def test_client_uses_given_action_feature_names(monkeypatch):
+    import lerobot.common.robots.utils as robot_utils
+    monkeypatch.setattr(
+        robot_utils, "make_robot_from_config", lambda cfg: pytest.fail("robot must not be instantiated")
+    )
+    config = _config(
+        server_port=5564,
+        timeout_ms=1,
+        robot_config=type("RC", (), {"type": "so100_follower"})(),
+        action_feature_names=["shoulder_pan.pos", "gripper.pos"],
+    )
+    client = RemoteInferenceClient(config)
+    monkeypatch.setattr(client._poller, "poll", lambda timeout=None: [])
+    assert client({}) == {"shoulder_pan.pos": 0.0, "gripper.pos": 0.0}
+    client.close()
+
+def test_server_batches_same_layout_observations():
+    class BatchPolicy(EchoPolicy):
+        def select_action(self, batch):
+            self.batch_sizes.append(batch["observation.state"].shape[0])
+            return batch["observation.state"] * 2
+
+    server = RemoteInferenceServer(_config(max_batch_size=4, max_batch_delay_ms=1.0))
+    server.policy = BatchPolicy()
+    server.policy.batch_sizes = []
+    observations = [{"observation.state": np.array([i, i + 1], dtype=np.float32)} for i in range(3)]
+    actions = server._predict(observations)
+    assert server.policy.batch_sizes == [3]
+    for i, action in enumerate(actions):
+        np.testing.assert_array_equal(action, [2 * i, 2 * i + 2])
+
+def test_server_batches_gym_style_observations():
+    from lerobot.remote import serial
+    server = RemoteInferenceServer(_config(max_batch_size=4))
+    requests = [
+        [b"client", b"req", *serial.encode({"agent_pos": np.array([i, i + 1, i + 2]), "task": "pick"})]
+        for i in range(2)
+    ]
+    groups, failures = server._decode_batch(requests)
+    assert not failures and len(groups) == 1
+    observations = [observation for _, _, observation in next(iter(groups.values()))]
+    for action in server._predict(observations):
+        np.testing.assert_array_equal(action, [0, 1, 2])
+
+def test_server_runs_eagerly_when_graph_capture_fails():
+    server = RemoteInferenceServer(_config())
+    # Capture fails without a GPU, as it does on a GPU for policies with ops that cannot be captured
+    server._use_graph = True
+    for _ in range(2):
+        actions = server._predict([{"observation.state": np.ones(3, dtype=np.float32)}])
+        np.testing.assert_array_equal(actions[0], [0, 1, 2])
+    assert server._graph is None and server._graph_key is None
+    assert not server._use_graph
+
+def test_server_survives_malformed_requests():
+    from lerobot.remote import serial
+    server = RemoteInferenceServer(_config())
+    requests = [
+        [b"client"],
+        [b"client", b"req-1"],
+        [b"client", b"req-2", *serial.encode({"observation.state": np.ones(3, dtype=np.float32)})],
+    ]
+    groups, failures = server._decode_batch(requests)
+    # The request without an id is dropped, the one without frames is answered with an error
+    assert [(identity, req_id) for identity, req_id, _ in failures] == [(b"client", b"req-1")]
+    assert [[req_id for _, req_id, _ in group] for group in groups.values()] == [[b"req-2"]]
+    # The stored errors keep the server alive past the test, so its socket would block interpreter exit
+    server.socket.close()
+
+def test_resolve_policy_path_keeps_local_directory(tmp_path):
+    from lerobot.remote.config import resolve_policy_path
+    assert resolve_policy_path(str(tmp_path)) == str(tmp_path)
+
+def test_resolve_policy_path_fetches_only_the_config(monkeypatch, tmp_path):
+    from huggingface_hub.errors import LocalEntryNotFoundError
+    from lerobot.remote import config as config_module
+    calls = []
+
+    def fake_download(repo_id, filename, local_files_only=False):
+        calls.append((repo_id, filename, local_files_only))
+        if local_files_only:
+            raise LocalEntryNotFoundError("not cached")
+        return str(tmp_path / filename)
+
+    monkeypatch.setattr(config_module, "hf_hub_download", fake_download)
+    assert config_module.resolve_policy_path("lerobot/my_policy") == str(tmp_path)
+    assert calls == [("lerobot/my_policy", "config.json", True), ("lerobot/my_policy", "config.json", False)]
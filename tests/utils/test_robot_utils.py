@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+# Copyright 2025 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from lerobot.common.utils.robot_utils import hybrid_wait
+
+
+def test_hybrid_wait_reaches_deadline():
+    start = time.perf_counter()
+    hybrid_wait(0.01)
+    assert time.perf_counter() - start >= 0.01
+
+
+def test_hybrid_wait_non_positive_returns_immediately():
+    start = time.perf_counter()
+    hybrid_wait(-1.0)
+    hybrid_wait(0.0)
+    assert time.perf_counter() - start < 0.01